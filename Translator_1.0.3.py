@@ -12,42 +12,22 @@ Updated: Add English Subtitle Extractor from Video Files
 import customtkinter as ctk
 import tkinter as tk
 from tkinter import filedialog, messagebox
-import pysrt
 import os
-import re
-import time
-import json
-import subprocess
-import threading
 import queue
-from threading import Thread
-from concurrent.futures import ThreadPoolExecutor
-from deep_translator import GoogleTranslator
-import sys
-
-# Charset detection
-try:
-    from charset_normalizer import from_path
-    _USE_NORMALIZER = True
-except Exception:
-    import chardet
-    _USE_NORMALIZER = False
-
-# -------------------------------------------------
-# Resource Path for PyInstaller (Icon + FFmpeg)
-# -------------------------------------------------
-def resource_path(relative_path):
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
+import multiprocessing
+from threading import Thread, Lock
+
+# All translation / conversion / extraction work lives in the headless engine
+from subtitle_translator import engine
+from subtitle_translator.cache import TranslationMemory
+from subtitle_translator.journal import JobJournal, default_journal_path
+from subtitle_translator.passthrough import CueClassifier
+from subtitle_translator.engine import (
+    resource_path, LANGUAGES, SRC_LANGS, ALL_DEST_LANGS, CJK_LANGUAGES,
+)
 
 # Paths for bundled files
 ICON_PATH = resource_path("icon.ico")
-FFMPEG_PATH = resource_path("ffmpeg.exe")
-FFPROBE_PATH = resource_path("ffprobe.exe")
-CREATE_NO_WINDOW = 0x08000000 if sys.platform == "win32" else 0
 
 # -------------------------------------------------
 # Settings
@@ -55,38 +35,16 @@ CREATE_NO_WINDOW = 0x08000000 if sys.platform == "win32" else 0
 ctk.set_appearance_mode("dark")
 ctk.set_default_color_theme("blue")
 
-LANGUAGES = {
-    "English": "en", "Sinhala": "si", "Arabic": "ar", "Dutch": "nl",
-    "French": "fr", "German": "de", "Italian": "it", "Polish": "pl",
-    "Romanian": "ro", "Greek": "el", "Hungarian": "hu", "Swedish": "sv",
-    "Danish": "da", "Finnish": "fi", "Norwegian": "no", "Czech": "cs",
-    "Croatian": "hr", "Ukrainian": "uk", "Indonesian": "id", "Malay": "ms",
-    "Filipino": "tl", "Japanese": "ja", "Korean": "ko", "Turkish": "tr",
-    "Russian": "ru", "Chinese (Simplified)": "zh-CN", "Chinese (Traditional)": "zh-TW",
-    "Vietnamese": "vi", "Thai": "th", "Portuguese": "pt", "Spanish": "es",
-    "Hindi": "hi", "Bengali": "bn"
-}
-
-SRC_LANGS = ["Auto"] + sorted(LANGUAGES.keys())
-ALL_DEST_LANGS = sorted(LANGUAGES.keys())
-CJK_LANGUAGES = {"Chinese (Simplified)", "Chinese (Traditional)", "Japanese", "Korean", "Thai", "Vietnamese"}
-
-# -------------------------------------------------
-# Helpers
-# -------------------------------------------------
-def clean_text(text):
-    text = re.sub(r"\{[^}]*\}", "", text)
-    text = re.sub(r"<[^>]*>", "", text)
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
-
 # -------------------------------------------------
 # Scrollable ComboBox
 # -------------------------------------------------
 class ScrollableComboBox(ctk.CTkFrame):
-    def __init__(self, master, values, default="", width=300, **kwargs):
+    # multi=True: several values can be ticked; get_all() returns them in list order
+    def __init__(self, master, values, default="", width=300, multi=False, **kwargs):
         super().__init__(master, **kwargs)
         self.values = values
+        self.multi = multi
+        self.selected = [default] if default else []
         self.var = ctk.StringVar(value=default)
         self.display = ctk.CTkLabel(self, text=default, width=width, height=40,
                                     corner_radius=10, fg_color="#2f2f2f", text_color="white",
@@ -94,7 +52,7 @@ class ScrollableComboBox(ctk.CTkFrame):
         self.display.pack(pady=(0, 4))
         self.display.bind("<Button-1>", lambda e: self._toggle())
         self.drop = ctk.CTkFrame(self, fg_color="#2b2b2b", corner_radius=8)
-        self.listbox = tk.Listbox(self.drop, height=10, selectmode="browse", activestyle="none",
+        self.listbox = tk.Listbox(self.drop, height=10, selectmode="multiple" if multi else "browse", activestyle="none",
                                   background="#2b2b2b", foreground="white",
                                   selectbackground="#1f6aa5", font=("Segoe UI", 11),
                                   highlightthickness=0, exportselection=False)
@@ -119,9 +77,9 @@ class ScrollableComboBox(ctk.CTkFrame):
         self.shown = True
         self.listbox.focus_set()
         try:
-            idx = self.values.index(self.var.get())
-            self.listbox.selection_set(idx)
-            self.listbox.see(idx)
+            for v in self.selected:
+                self.listbox.selection_set(self.values.index(v))
+            self.listbox.see(self.values.index(self.selected[0]))
         except: pass
 
     def _hide(self):
@@ -132,47 +90,21 @@ class ScrollableComboBox(ctk.CTkFrame):
     def _select(self, _=None):
         sel = self.listbox.curselection()
         if sel:
-            val = self.values[sel[0]]
+            self.selected = [self.values[i] for i in sel]
+            val = ", ".join(self.selected)
             self.var.set(val)
             self.display.configure(text=val)
-            self._hide()
+            if not self.multi:
+                self._hide()
 
-    def get(self): return self.var.get()
+    def get(self): return self.selected[0] if self.selected else ""
+    def get_all(self): return list(self.selected)
     def set(self, v):
-        if v in self.values:
-            self.var.set(v)
-            self.display.configure(text=v)
-
-# -------------------------------------------------
-# FFmpeg Helpers (No Console Window)
-# -------------------------------------------------
-def run_ffprobe(file_path):
-    cmd = [FFPROBE_PATH, "-v", "error", "-select_streams", "s",
-           "-show_entries", "stream=index:stream_tags=language,title", "-of", "json", file_path]
-    try:
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False, creationflags=CREATE_NO_WINDOW)
-        return json.loads(result.stdout) if result.returncode == 0 else None
-    except Exception:
-        return None
-
-def is_english_stream(stream):
-    tags = stream.get("tags", {}) or {}
-    lang = (tags.get("language") or "").lower()
-    title = (tags.get("title") or "").lower()
-    return lang in {"en", "eng", "en-gb", "en-us"} or "english" in title or "eng" in title
-
-def find_english_subtitle_streams(file_path):
-    data = run_ffprobe(file_path)
-    if not data: return []
-    return [s for s in data.get("streams", []) if is_english_stream(s)]
-
-def extract_subtitle_stream(file_path, stream_index, out_path):
-    cmd = [FFMPEG_PATH, "-y", "-i", file_path, "-map", f"0:{stream_index}", "-c:s", "srt", out_path]
-    try:
-        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False, creationflags=CREATE_NO_WINDOW)
-        return result.returncode == 0, result.stderr
-    except Exception:
-        return False, "ffmpeg error"
+        values = [x for x in (v if isinstance(v, (list, tuple)) else [v]) if x in self.values]
+        if values:
+            self.selected = values
+            self.var.set(", ".join(values))
+            self.display.configure(text=", ".join(values))
 
 # -------------------------------------------------
 # Main Application
@@ -196,17 +128,27 @@ class SRTTranslatorApp(ctk.CTk):
 
         self.selected_files = []
         self.translated_subs_list = []
+        self.journal_path = None
+        self.lines_failed = 0
         self.output_folder = tk.StringVar(value="")
         self.cjk_enabled = tk.BooleanVar(value=False)
+        self.stream_output = tk.BooleanVar(value=False)
+        self.merge_sentences = tk.BooleanVar(value=False)
+        self.detect_language = tk.BooleanVar(value=False)
+        self.keep_sound_tags = tk.BooleanVar(value=False)
 
         self.video_files = []
         self.extractor_output_dir = ""
         self.extractor_queue = queue.Queue()
         self.utf8_queue = queue.Queue()
+        self.translate_queue = queue.Queue()
+        # Workers post into the queues; the first post after an idle period
+        # schedules a single drain, so nothing runs while the app is idle
+        self._drain_lock = Lock()
+        self._drain_scheduled = False
 
         self._menu_ui()
         self._translate_ui()
-        self.after(100, self._process_queues)
 
     def _menu_ui(self):
         mf = ctk.CTkFrame(self)
@@ -258,23 +200,33 @@ class SRTTranslatorApp(ctk.CTk):
         lf.grid_columnconfigure(0, weight=1); lf.grid_columnconfigure(1, weight=1)
 
         ctk.CTkLabel(lf, text="Source Language:", font=ctk.CTkFont(size=13, weight="bold")).grid(row=0, column=0, pady=(0,8), sticky="w", padx=20)
-        ctk.CTkLabel(lf, text="Target Language:", font=ctk.CTkFont(size=13, weight="bold")).grid(row=0, column=1, pady=(0,8), sticky="w", padx=20)
+        ctk.CTkLabel(lf, text="Target Language(s):", font=ctk.CTkFont(size=13, weight="bold")).grid(row=0, column=1, pady=(0,8), sticky="w", padx=20)
 
         self.src = ScrollableComboBox(lf, SRC_LANGS, "Auto", width=380)
         self.src.grid(row=1, column=0, sticky="ew", padx=(20,10), pady=(0,10))
 
         self.dest_langs = [l for l in ALL_DEST_LANGS if l not in CJK_LANGUAGES]
-        self.dst = ScrollableComboBox(lf, self.dest_langs, "Sinhala", width=380)
+        self.dst = ScrollableComboBox(lf, self.dest_langs, "Sinhala", width=380, multi=True)
         self.dst.grid(row=1, column=1, sticky="ew", padx=(10,20), pady=(0,10))
 
+        # Two columns of options, so the log below still fits the window
         cjk_frame = ctk.CTkFrame(self)
-        cjk_frame.pack(pady=8)
+        cjk_frame.pack(pady=8, padx=80, fill="x")
+        cjk_frame.grid_columnconfigure(0, weight=1); cjk_frame.grid_columnconfigure(1, weight=1)
         self.cjk_check = ctk.CTkCheckBox(cjk_frame, text="Enable CJK Target Languages (Chinese, Japanese, Korean, Thai, Vietnamese)",
                                          variable=self.cjk_enabled, command=self._toggle_cjk)
-        self.cjk_check.pack()
+        self.cjk_check.grid(row=0, column=0, columnspan=2, pady=(6, 0))
+        ctk.CTkCheckBox(cjk_frame, text="Save each file as soon as it is translated (low memory)",
+                        variable=self.stream_output).grid(row=1, column=0, sticky="w", padx=20, pady=(6, 0))
+        ctk.CTkCheckBox(cjk_frame, text="Translate sentences split across cues as a whole",
+                        variable=self.merge_sentences).grid(row=1, column=1, sticky="w", padx=20, pady=(6, 0))
+        ctk.CTkCheckBox(cjk_frame, text="Detect languages offline (keep lines already in the target)",
+                        variable=self.detect_language).grid(row=2, column=0, sticky="w", padx=20, pady=6)
+        ctk.CTkCheckBox(cjk_frame, text="Keep sound-tag cues like [DOOR SLAMS] or (sighs) as they are",
+                        variable=self.keep_sound_tags).grid(row=2, column=1, sticky="w", padx=20, pady=6)
 
         self.tr_btn = ctk.CTkButton(self, text="Start Translation", height=50, font=ctk.CTkFont(size=15, weight="bold"), state="disabled", command=self._start)
-        self.tr_btn.pack(pady=20)
+        self.tr_btn.pack(pady=10)
 
         self.prog = ctk.CTkProgressBar(self, width=950)
         self.prog.pack(pady=10); self.prog.set(0)
@@ -288,14 +240,22 @@ class SRTTranslatorApp(ctk.CTk):
         ctk.CTkButton(of, text="Choose Output Folder", command=self._browse_output_folder).pack(side="right", padx=20)
 
         self.save_btn = ctk.CTkButton(self, text="Save All Translated Files", height=50, state="disabled", command=self._save_all)
-        self.save_btn.pack(pady=20)
+        self.save_btn.pack(pady=10)
+
+        log_frame = ctk.CTkFrame(self)
+        log_frame.pack(pady=(0, 10), padx=80, fill="both", expand=True)
+        ctk.CTkLabel(log_frame, text="Translation Log:", font=ctk.CTkFont(size=13, weight="bold")).pack(anchor="w", padx=15, pady=(4, 2))
+        self.translate_log = ctk.CTkTextbox(log_frame, height=80)
+        self.translate_log.pack(fill="both", expand=True, padx=15, pady=(0, 10))
+        self.translate_log.configure(state="disabled")
 
     def _toggle_cjk(self):
-        current = self.dst.get()
+        current = self.dst.get_all()
         new_langs = ALL_DEST_LANGS if self.cjk_enabled.get() else [l for l in ALL_DEST_LANGS if l not in CJK_LANGUAGES]
         self.dst.destroy()
-        default = current if current in new_langs else new_langs[0]
-        self.dst = ScrollableComboBox(self.winfo_children()[3], new_langs, default, width=380)
+        default = [l for l in current if l in new_langs] or [new_langs[0]]
+        self.dst = ScrollableComboBox(self.winfo_children()[3], new_langs, default[0], width=380, multi=True)
+        self.dst.set(default)
         self.dst.grid(row=1, column=1, sticky="ew", padx=(10,20), pady=(0,10))
 
     def _browse(self):
@@ -314,91 +274,95 @@ class SRTTranslatorApp(ctk.CTk):
             self.output_lbl.configure(text=f"Output: {folder}", text_color="#00ff00")
 
     def _start(self):
-        if not self.selected_files: return
+        if not self.selected_files or not self.dst.get_all(): return
         self.tr_btn.configure(state="disabled")
         self.save_btn.configure(state="disabled")
         self.stat.configure(text="Translating...", text_color="yellow")
         self.prog.set(0)
+        self.translate_log.configure(state="normal")
+        self.translate_log.delete("1.0", "end")
+        self.translate_log.configure(state="disabled")
         Thread(target=self._translate_batch, daemon=True).start()
 
     def _translate_batch(self):
-        total_files = len(self.selected_files)
-        src_code = "auto" if self.src.get() == "Auto" else LANGUAGES[self.src.get()]
-        dst_lang = self.dst.get()
-        dst_code = LANGUAGES[dst_lang]
-        is_cjk = dst_lang in CJK_LANGUAGES
-        BATCH_SIZE = 5 if is_cjk else 15
-        MAX_WORKERS = 3 if is_cjk else 5
-
-        for idx, path in enumerate(self.selected_files):
-            try:
-                subs = pysrt.open(path, encoding="utf-8")
-            except Exception as e:
-                self.after(0, lambda: messagebox.showerror("Error", f"Cannot open {path}\n{e}"))
-                continue
-
-            idxs = [i for i, s in enumerate(subs) if s.text.strip()]
-            total = len(idxs)
-            if not total: continue
-
-            batches = [idxs[i:i + BATCH_SIZE] for i in range(0, len(idxs), BATCH_SIZE)]
-            out = [""] * len(subs)
-            done = 0
-
-            def batch_job(batch_idxs):
-                texts = [clean_text(subs[i].text) for i in batch_idxs]
-                if not texts: return []
-                unique_id = hash(tuple(texts)) & 0xFFFFFFFFFFFFFFFF
-                delimiter = f"\n\n||---UNIQUE_SUB_SPLIT_{unique_id}---||\n\n"
-                combined = delimiter.join(texts)
-                try:
-                    translated = GoogleTranslator(source=src_code, target=dst_code).translate(combined)
-                    if not translated:
-                        raise Exception("Empty response")
-                    parts = translated.split(delimiter)
-                    if len(parts) != len(texts):
-                        return [(batch_idxs[j], f"[PARTIAL FAIL] {texts[j]}") for j in range(len(texts))]
-                    return [(batch_idxs[j], parts[j].strip() or texts[j]) for j in range(len(texts))]
-                except Exception as e:
-                    self.after(0, lambda: self.stat.configure(text=f"Batch error: {str(e)[:50]}", text_color="red"))
-                    return [(i, subs[i].text) for i in batch_idxs]
-
-            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
-                futures = [pool.submit(batch_job, b) for b in batches]
-                for fut in futures:
-                    try:
-                        results = fut.result(timeout=180)
-                        for i, txt in results:
-                            out[i] = txt
-                        done += len(results)
-                        progress = (idx + done / total) / total_files
-                        self.after(0, lambda p=progress: self.prog.set(p))
-                        self.after(0, lambda: self.stat.configure(text=f"File {idx+1}/{total_files} — {done}/{total} lines", text_color="cyan"))
-                    except Exception as e:
-                        self.after(0, lambda: self.stat.configure(text=f"Error: {e}", text_color="red"))
-
-            translated_subs = [pysrt.SubRipItem(index=s.index, start=s.start, end=s.end,
-                                text=out[i] if out[i] else s.text) for i, s in enumerate(subs)]
-            self.translated_subs_list.append((path, translated_subs))
-
-        self.after(0, self._done_batch)
-
-    def _done_batch(self):
+        src_code = engine.lang_code(self.src.get())
+        dst_codes = [LANGUAGES[l] for l in self.dst.get_all()]
+        streaming = self.stream_output.get()
+        merge_gap = engine.DEFAULT_MERGE_GAP_MS if self.merge_sentences.get() else None
+        detect_language = self.detect_language.get()
+        classifier = CueClassifier(sound_tags=self.keep_sound_tags.get())
+
+        # The pipeline reports per batch; the UI thread coalesces (see _drain_translate_queue)
+        report = lambda t, p: self._post(self.translate_queue, t, p)
+
+        try:
+            memory = TranslationMemory()
+        except Exception:
+            memory = None  # read-only profile etc. - just translate without it
+        # Same selection after a crash picks up where it stopped
+        try:
+            journal = JobJournal(default_journal_path(self.selected_files, src_code, dst_codes))
+        except Exception:
+            journal = None
+        saved = failed = 0
+        self.lines_failed = 0
+        try:
+            if streaming:
+                # Written (atomically) as each file finishes, then dropped from memory
+                folder = self.output_folder.get() or None
+                for path, code, save_path, error, lines_failed in engine.stream_translate(self.selected_files, src_code, dst_codes,
+                                                                            folder, report=report, memory=memory,
+                                                                            journal=journal, merge_gap=merge_gap,
+                                                                            detect_language=detect_language,
+                                                                            classifier=classifier):
+                    if error is None: saved += 1
+                    if error is not None or lines_failed: failed += 1
+            else:
+                # Every (file, language) pair shares one pipeline; files are parsed once
+                for path, code, translated_subs, lines_failed in engine.translate_files_multi(self.selected_files, src_code, dst_codes,
+                                                                                report=report, memory=memory,
+                                                                                journal=journal, merge_gap=merge_gap,
+                                                                                detect_language=detect_language,
+                                                                                classifier=classifier):
+                    self.translated_subs_list.append((path, code, translated_subs))
+                    self.lines_failed += lines_failed
+        finally:
+            if memory:
+                memory.close()
+            if journal:
+                journal.close()
+        self.journal_path = journal.path if journal else None
+        if streaming and not failed and saved == len(self.selected_files) * len(dst_codes) and journal:
+            journal.discard()
+
+        self._post(self.translate_queue, "done", saved if streaming else None)
+
+    def _done_batch(self, streamed=None):
+        self.tr_btn.configure(state="normal")
+        if streamed is not None:
+            self.stat.configure(text=f"Translation Complete! {streamed} files saved", text_color="#00ff00")
+            return
         self.stat.configure(text="Translation Complete!", text_color="#00ff00")
         self.save_btn.configure(state="normal")
-        self.tr_btn.configure(state="normal")
 
     def _save_all(self):
         if not self.translated_subs_list: return
         folder = self.output_folder.get() or os.path.dirname(self.selected_files[0])
-        lang_code = LANGUAGES[self.dst.get()].replace("-", "").lower()
-        for orig_path, subs in self.translated_subs_list:
-            name, ext = os.path.splitext(os.path.basename(orig_path))
-            save_path = os.path.join(folder, f"{name}.{lang_code}{ext}")
+        failed = 0
+        for orig_path, dst_code, subs in self.translated_subs_list:
+            save_path = engine.translated_path(orig_path, dst_code, folder)
             try:
-                pysrt.SubRipFile(subs).save(save_path, encoding="utf-8")
+                engine.save_translated(orig_path, subs, dst_code, folder)
             except Exception as e:
+                failed += 1
                 messagebox.showerror("Error", f"Save failed: {save_path}\n{e}")
+        # Everything is on disk now; the resume journal is no longer needed
+        # Lines that ran out of retries are not in the journal either; keep it for a rerun
+        if not failed and not self.lines_failed and self.journal_path and os.path.exists(self.journal_path):
+            try:
+                os.remove(self.journal_path)
+            except OSError:
+                pass
         messagebox.showinfo("Success", f"All files saved to:\n{folder}")
         self.stat.configure(text="All saved!", text_color="#00ff00")
 
@@ -453,32 +417,7 @@ class SRTTranslatorApp(ctk.CTk):
         Thread(target=self._utf8_worker, daemon=True).start()
 
     def _utf8_worker(self):
-        total = len(self.selected_files)
-        success = 0
-        for i, file_path in enumerate(self.selected_files):
-            name = os.path.basename(file_path)
-            self.utf8_queue.put(("log", f"[{i+1}/{total}] {name}\n"))
-            try:
-                if _USE_NORMALIZER:
-                    encoding = from_path(file_path).best().encoding if from_path(file_path).best() else "utf-8"
-                else:
-                    raw = open(file_path, "rb").read()
-                    encoding = chardet.detect(raw)["encoding"] or "utf-8"
-
-                with open(file_path, "r", encoding=encoding, errors="replace") as f:
-                    content = f.read()
-                with open(file_path, "w", encoding="utf-8", newline="") as f:
-                    f.write(content)
-
-                success += 1
-                self.utf8_queue.put(("log", "   Success\n\n"))
-            except Exception as e:
-                self.utf8_queue.put(("log", f"   Failed: {str(e)}\n\n"))
-
-            self.utf8_queue.put(("progress", ((i+1)/total, i+1, total)))
-
-        self.utf8_queue.put(("log", f"Complete! {success}/{total} succeeded.\n"))
-        self.utf8_queue.put(("done", None))
+        engine.convert_files(self.selected_files, report=lambda t, p: self._post(self.utf8_queue, t, p))
 
     # =============================================
     # 3. ENGLISH SUBTITLE EXTRACTOR
@@ -559,52 +498,94 @@ class SRTTranslatorApp(ctk.CTk):
         Thread(target=self._extractor_worker, daemon=True).start()
 
     def _extractor_worker(self):
-        total = len(self.video_files)
-        for i, path in enumerate(self.video_files):
-            name = os.path.basename(path)
-            self.extractor_queue.put(("log", f"[{i+1}/{total}] {name}\n"))
-            streams = find_english_subtitle_streams(path)
-            if not streams:
-                self.extractor_queue.put(("log", "   No English subtitles found.\n\n"))
-            else:
-                self.extractor_queue.put(("log", f"   Found {len(streams)} English track(s)\n"))
-                for s in streams:
-                    idx = s["index"]
-                    out_name = f"{os.path.splitext(name)[0]}_eng_{idx}.srt"
-                    out_path = os.path.join(self.extractor_output_dir, out_name)
-                    self.extractor_queue.put(("log", f"   Extracting → {out_name} ... "))
-                    success, _ = extract_subtitle_stream(path, idx, out_path)
-                    self.extractor_queue.put(("log", "Success!\n" if success else "Failed!\n"))
-                self.extractor_queue.put(("log", "\n"))
-            self.extractor_queue.put(("progress", ((i+1)/total, i+1, total)))
-        self.extractor_queue.put(("log", "All extraction completed!\n"))
-        self.extractor_queue.put(("done", None))
+        engine.extract_files(self.video_files, self.extractor_output_dir,
+                             report=lambda t, p: self._post(self.extractor_queue, t, p))
+
+    def _post(self, q, msg_type, payload):
+        """Called from worker threads: queue a message and wake the UI if it's idle."""
+        q.put((msg_type, payload))
+        with self._drain_lock:
+            if self._drain_scheduled:
+                return
+            self._drain_scheduled = True
+        # The delay batches a burst of messages into one drain (at most 10 per second)
+        self.after(100, self._process_queues)
 
     def _process_queues(self):
+        # Clear the flag first: anything posted from here on schedules the next drain
+        with self._drain_lock:
+            self._drain_scheduled = False
         for q, log_widget, prog, prog_label, btn in [
             (self.extractor_queue, getattr(self, "extractor_log", None), getattr(self, "extractor_progress", None), getattr(self, "extractor_progress_label", None), getattr(self, "extractor_start_btn", None)),
             (self.utf8_queue, getattr(self, "utf8_log", None), getattr(self, "utf8_progress", None), getattr(self, "utf8_progress_label", None), getattr(self, "convert_btn", None))
         ]:
+            lines, progress, done = [], None, False
             try:
                 while True:
                     msg_type, payload = q.get_nowait()
-                    if msg_type == "log" and log_widget:
-                        log_widget.configure(state="normal")
-                        log_widget.insert("end", payload)
-                        log_widget.see("end")
-                        log_widget.configure(state="disabled")
-                    elif msg_type == "progress" and prog:
-                        prog.set(payload[0])
-                        prog_label.configure(text=f"Progress: {payload[1]} / {payload[2]}")
-                    elif msg_type == "done" and btn:
-                        btn.configure(state="normal")
+                    if msg_type == "log":
+                        lines.append(payload)
+                    elif msg_type == "progress":
+                        progress = payload
+                    elif msg_type == "done":
+                        done = True
             except queue.Empty:
                 pass
-        self.after(100, self._process_queues)
+            # One insert per widget per drain, however many lines arrived
+            if lines and log_widget:
+                log_widget.configure(state="normal")
+                log_widget.insert("end", "".join(lines))
+                log_widget.see("end")
+                log_widget.configure(state="disabled")
+            if progress and prog:
+                prog.set(progress[0])
+                prog_label.configure(text=f"Progress: {progress[1]} / {progress[2]}")
+            if done and btn:
+                btn.configure(state="normal")
+        self._drain_translate_queue()
+
+    def _drain_translate_queue(self):
+        # Hundreds of progress/status updates can arrive between ticks; only the
+        # latest of each is worth drawing, so at most one redraw per tick (10 Hz)
+        latest = {}
+        lines = []
+        done = False
+        streamed = None
+        try:
+            while True:
+                msg_type, payload = self.translate_queue.get_nowait()
+                if msg_type == "file_error":
+                    path, e = payload
+                    messagebox.showerror("Error", f"Cannot open {path}\n{e}")
+                elif msg_type == "done":
+                    done, streamed = True, payload
+                elif msg_type in ("status", "error"):
+                    latest["stat"] = (msg_type, payload)
+                elif msg_type == "log":
+                    # Per-file summaries and the run's dedup / skipped-cue totals
+                    lines.append(payload)
+                else:
+                    latest[msg_type] = payload
+        except queue.Empty:
+            pass
+        if lines:
+            self.translate_log.configure(state="normal")
+            self.translate_log.insert("end", "".join(lines))
+            self.translate_log.see("end")
+            self.translate_log.configure(state="disabled")
+        if "progress" in latest:
+            self.prog.set(latest["progress"])
+        if "stat" in latest:
+            msg_type, text = latest["stat"]
+            self.stat.configure(text=text, text_color="cyan" if msg_type == "status" else "red")
+        if done:
+            self._done_batch(streamed)
 
 # =============================================
 # Run App
 # =============================================
 if __name__ == "__main__":
+    # The UTF-8 converter uses worker processes; a frozen .exe must not reopen the window in them
+    multiprocessing.freeze_support()
     app = SRTTranslatorApp()
     app.mainloop()
\ No newline at end of file
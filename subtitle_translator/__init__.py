@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+"""
+Headless subtitle translation engine shared by the GUI and the CLI.
+"""
+
+from .engine import (
+    LANGUAGES, SRC_LANGS, ALL_DEST_LANGS, CJK_LANGUAGES, CJK_CODES,
+    lang_code, batch_settings, clean_text,
+    translate_subs, translate_files, translate_files_multi, translated_path, save_translated,
+    stream_translate,
+    detect_encoding, convert_to_utf8, convert_files,
+    find_english_subtitle_streams, extract_subtitle_stream, extract_files,
+)
+from .cache import TranslationMemory
+from .limiter import AdaptiveLimiter
+from .backends import TranslatorBackend, GoogleBackend, make_backend
+from .metrics import Metrics, serve_metrics
+from .tracing import Tracer
+from .passthrough import CueClassifier
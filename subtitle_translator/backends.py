@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+Translator backends.
+
+Every backend implements TranslatorBackend: translate a list of texts in
+one request and report its limits. GoogleBackend talks to the same
+endpoint as deep_translator's GoogleTranslator but keeps one pooled
+keep-alive requests.Session for the whole run instead of building a
+translator (and a TLS connection) per batch. Point it at
+stub_server.py with url=... to run everything offline. How segments are
+joined into one request and split back is up to the segment protocol
+(segments.py).
+"""
+
+import socket
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from bs4 import BeautifulSoup
+from deep_translator.constants import BASE_URLS
+from deep_translator.exceptions import (
+    NotValidLength, NotValidPayload, RequestError, TooManyRequests, TranslationNotFound,
+)
+
+from .segments import get_protocol
+
+GOOGLE_MAX_CHARS = 5000
+# Total wall-clock budget per HTTP request (connect + send + whole body)
+DEFAULT_TIMEOUT = 30
+CONNECT_TIMEOUT = 10
+
+class SplitMismatch(Exception):
+    """The response didn't split back into one part per input text."""
+
+    def __init__(self, expected, translated):
+        super().__init__(f"couldn't split the response into {expected} parts")
+        self.expected = expected
+        self.translated = translated
+
+class EmptyResponse(Exception):
+    pass
+
+class DeadlineExceeded(Exception):
+    """The request ran past its deadline and was aborted (connection dropped)."""
+
+# -------------------------------------------------
+# Hard request deadlines
+# -------------------------------------------------
+# requests' timeouts bound each socket wait, not the request: a server sending
+# a byte every few seconds (headers or body) never trips them. A watchdog
+# timer shuts the connection's socket down when the deadline passes, which
+# wakes a blocked read in the worker thread whatever phase it is in.
+_active = threading.local()
+
+class _Deadline:
+    def __init__(self, seconds):
+        self.expired = False
+        self._conn = None
+        self._finished = False
+        self._lock = threading.Lock()
+        self._timer = threading.Timer(seconds, self._expire)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def attach(self, conn):
+        with self._lock:
+            self._conn = conn
+            if self.expired:
+                _shutdown(conn)
+
+    def finish(self):
+        with self._lock:
+            self._finished = True
+            self._timer.cancel()
+
+    def _expire(self):
+        with self._lock:
+            if self._finished:
+                return
+            self.expired = True
+            if self._conn is not None and getattr(self._conn, "sock", None) is None:
+                # Still connecting (bounded by the connect timeout): look again shortly
+                self._timer = threading.Timer(0.05, self._expire)
+                self._timer.daemon = True
+                self._timer.start()
+            elif self._conn is not None:
+                _shutdown(self._conn)
+
+def _shutdown(conn):
+    sock = getattr(conn, "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+class _DeadlinePoolMixin:
+    def _make_request(self, conn, *args, **kwargs):
+        deadline = getattr(_active, "deadline", None)
+        if deadline is not None:
+            deadline.attach(conn)
+        return super()._make_request(conn, *args, **kwargs)
+
+class _DeadlineHTTPPool(_DeadlinePoolMixin, HTTPConnectionPool):
+    pass
+
+class _DeadlineHTTPSPool(_DeadlinePoolMixin, HTTPSConnectionPool):
+    pass
+
+_DEADLINE_POOLS = {"http": _DeadlineHTTPPool, "https": _DeadlineHTTPSPool}
+
+class _DeadlineAdapter(HTTPAdapter):
+    """HTTPAdapter whose connections can be cut by the calling thread's _Deadline."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = _DEADLINE_POOLS
+
+    def proxy_manager_for(self, proxy, **proxy_kwargs):
+        manager = super().proxy_manager_for(proxy, **proxy_kwargs)
+        if not proxy.lower().startswith("socks"):
+            manager.pool_classes_by_scheme = _DEADLINE_POOLS
+        return manager
+
+class TranslatorBackend:
+    """
+    Base class. Subclasses implement translate(text, target, source) for one
+    joined request; translate_batch joins texts with the segment protocol and
+    splits the answer back. target/source=None mean the backend's defaults.
+    """
+    name = "base"
+    max_chars = GOOGLE_MAX_CHARS
+    protocol = get_protocol()
+
+    def translate(self, text, target=None, source=None):
+        raise NotImplementedError
+
+    def translate_batch(self, texts, target=None, source=None):
+        """One request for all texts; raises SplitMismatch if the parts don't line up."""
+        payload, key = self.protocol.encode(texts)
+        translated = self.translate(payload, target, source)
+        if not translated:
+            raise EmptyResponse("Empty response")
+        parts = self.protocol.decode(translated, len(texts), key)
+        if parts is None:
+            raise SplitMismatch(len(texts), translated)
+        return parts
+
+    def limits(self):
+        return {"max_chars": self.max_chars, "overhead": self.protocol.overhead}
+
+    def close(self):
+        pass
+
+class GoogleBackend(TranslatorBackend):
+    """Thread-safe; share one instance across every batch, file and target language of a run."""
+    name = "google"
+
+    def __init__(self, source="auto", target="en", pool_size=16, timeout=DEFAULT_TIMEOUT, proxies=None, url=None,
+                 protocol=None):
+        self.source = source
+        self.target = target
+        self.timeout = timeout
+        self.url = url or BASE_URLS["GOOGLE_TRANSLATE"]
+        self.protocol = get_protocol(protocol)
+        self.session = requests.Session()
+        # One connection per in-flight request; block rather than open extras
+        adapter = _DeadlineAdapter(pool_connections=1, pool_maxsize=pool_size, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if proxies:
+            self.session.proxies.update(proxies)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def translate(self, text, target=None, source=None):
+        target = target or self.target
+        source = source or self.source
+        if not isinstance(text, str):
+            raise NotValidPayload(text)
+        if len(text) >= GOOGLE_MAX_CHARS:
+            raise NotValidLength(text, 0, GOOGLE_MAX_CHARS)
+        text = text.strip()
+        if not text or source == target:
+            return text
+        params = {"sl": source, "tl": target, "q": text}
+        with self._lock:
+            self.requests += 1
+        body = self._fetch(params)
+        soup = BeautifulSoup(body, "html.parser")
+        element = soup.find("div", {"class": "t0"}) or soup.find("div", {"class": "result-container"})
+        if not element:
+            raise TranslationNotFound(text)
+        return element.get_text(strip=True)
+
+    def _fetch(self, params):
+        """
+        GET with a hard deadline over connect, headers and body. requests' own
+        timeout only bounds each socket wait, so a server trickling bytes could
+        hold a worker forever; a watchdog (_Deadline) shuts the connection down
+        once self.timeout has passed, mid-read or not.
+        """
+        deadline = _Deadline(self.timeout)
+        _active.deadline = deadline
+        response = None
+        try:
+            response = self.session.get(self.url, params=params, stream=True,
+                                        timeout=(min(CONNECT_TIMEOUT, self.timeout), self.timeout))
+            if response.status_code == 429:
+                raise TooManyRequests()
+            if response.status_code != 200:
+                raise RequestError()
+            body = response.content
+            if deadline.expired:
+                raise DeadlineExceeded(f"response took longer than {self.timeout}s")
+            return body.decode(response.encoding or "utf-8", errors="replace")
+        except requests.RequestException as e:
+            if deadline.expired or isinstance(e, requests.Timeout):
+                raise DeadlineExceeded(f"no complete response within {self.timeout}s") from e
+            raise
+        finally:
+            deadline.finish()
+            _active.deadline = None
+            if response is not None:
+                # Closing an unfinished response drops the connection instead of
+                # returning it to the pool half-read
+                response.close()
+
+    def limits(self):
+        return {"max_chars": GOOGLE_MAX_CHARS, "overhead": self.protocol.overhead, "url": self.url,
+                "timeout": self.timeout}
+
+    def close(self):
+        self.session.close()
+
+def make_backend(source, target, pool_size=16, url=None, timeout=DEFAULT_TIMEOUT, protocol=None):
+    """
+    Backend for a run; url points the Google client at a compatible endpoint
+    (e.g. the stub server), protocol picks the segment format (segments.PROTOCOLS).
+    """
+    return GoogleBackend(source, target, pool_size=pool_size, timeout=timeout, url=url, protocol=protocol)
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+"""
+Request packing: fill each translator request up to a character budget
+instead of a fixed number of lines.
+"""
+
+from .segments import get_protocol
+
+# Google's web endpoint rejects anything over 5000 characters; leave headroom
+DEFAULT_MAX_CHARS = 4500
+DEFAULT_MAX_LINES = 50
+CJK_MAX_CHARS = 2000
+CJK_MAX_LINES = 20
+
+# Worst-case boundary of the default segment protocol, so a packed batch
+# never exceeds the budget once joined
+DELIMITER_OVERHEAD = get_protocol().overhead
+
+def utf8_len(text):
+    return len(text.encode("utf-8"))
+
+def pack_batches(texts, max_chars=DEFAULT_MAX_CHARS, max_lines=DEFAULT_MAX_LINES,
+                 overhead=DELIMITER_OVERHEAD, measure=len):
+    """
+    Greedily split texts (in order) into batches whose joined size, counting
+    one delimiter between neighbours, stays within max_chars and max_lines.
+    Pass measure=utf8_len to budget bytes instead of characters.
+    A single text larger than the budget is sent on its own.
+    """
+    batches = []
+    cur = []
+    size = 0
+    for t in texts:
+        n = measure(t)
+        extra = n + (overhead if cur else 0)
+        if cur and (size + extra > max_chars or len(cur) >= max_lines):
+            batches.append(cur)
+            cur, size, extra = [], 0, n
+        cur.append(t)
+        size += extra
+    if cur:
+        batches.append(cur)
+    return batches
@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+"""
+Stage-by-stage benchmark on a synthetic subtitle corpus.
+
+    python -m subtitle_translator.bench --files 20 --cues 800 --repeat 3 -o before.json
+    python -m subtitle_translator.bench --files 20 --cues 800 --repeat 3 --compare before.json
+
+Generates a reproducible corpus (same --seed, same files), then times each
+stage on its own: encoding conversion (serial and over worker processes), parsing, clean_text and the
+markup-preserving normalizer, per-cue language ID, batching, translation against the local stub
+server and writing. Results are JSON; --compare exits 1 when a stage got
+slower than --threshold allows.
+
+    python -m subtitle_translator.bench --protocols markers,legacy --mangle 0.05
+
+instead translates the corpus once per segment protocol against a stub
+that damages a share of the boundaries, and reports boundary characters
+per request and how often a response failed to split.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+
+from .batching import pack_batches, utf8_len
+from .backends import make_backend
+from .stub_server import start_stub_server
+from .segments import PROTOCOLS
+from .metrics import Metrics
+from .markup import protect, restore
+from .langid import detect
+from . import engine
+
+# Reference for the parse stage, if installed
+try:
+    import pysrt
+except Exception:
+    pysrt = None
+
+# Mix of plain ASCII and accented words so legacy code pages actually differ from UTF-8
+WORDS = ("the we you I it was not what this that where here now come go know think want night "
+         "never always please listen wait look sorry right okay home tomorrow yesterday "
+         "café déjà naïve señor garçon über façade résumé piñata").split()
+TAGS = [("<i>", "</i>"), ("<b>", "</b>"), ("{\\an8}", ""), ('<font color="#ffff00">', "</font>")]
+
+# -------------------------------------------------
+# Corpus
+# -------------------------------------------------
+def _timestamp(ms):
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+def _line(rng, min_words, max_words):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words))]
+    return " ".join(words).capitalize() + rng.choice(".?!,")
+
+def make_srt(rng, cues=500, min_words=3, max_words=10, two_line_rate=0.3, tag_rate=0.1, dup_rate=0.2):
+    """One SRT document as text. dup_rate: share of cues repeating an earlier cue's text."""
+    blocks, texts = [], []
+    ms = 1000
+    for i in range(cues):
+        if texts and rng.random() < dup_rate:
+            text = rng.choice(texts)
+        else:
+            lines = [_line(rng, min_words, max_words)]
+            if rng.random() < two_line_rate:
+                lines.append(_line(rng, min_words, max_words))
+            if rng.random() < tag_rate:
+                open_tag, close_tag = rng.choice(TAGS)
+                lines[0] = open_tag + lines[0] + close_tag
+            text = "\n".join(lines)
+            texts.append(text)
+        length = rng.randint(800, 4000)
+        blocks.append(f"{i+1}\n{_timestamp(ms)} --> {_timestamp(ms + length)}\n{text}\n")
+        ms += length + rng.randint(50, 1500)
+    return "\n".join(blocks)
+
+def generate_corpus(folder, files=10, encodings=("utf-8",), seed=0, **options):
+    """Write files named bench_NNN.srt, cycling through encodings; returns the paths."""
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for n in range(files):
+        encoding = encodings[n % len(encodings)]
+        path = os.path.join(folder, f"bench_{n:03d}.srt")
+        with open(path, "w", encoding=encoding, errors="replace", newline="\r\n") as f:
+            f.write(make_srt(rng, **options))
+        paths.append(path)
+    return paths
+
+# -------------------------------------------------
+# Stages
+# -------------------------------------------------
+def _regex_chain_clean_text(text):
+    # The original three-pass clean_text, kept as the reference for the normalizer stages
+    text = re.sub(r"\{[^}]*\}", "", text)
+    text = re.sub(r"<[^>]*>", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+def _timed(fn, repeat, setup=None):
+    runs, result = [], None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        result = fn()
+        runs.append(time.perf_counter() - start)
+    return runs, result
+
+def _stage(runs, items, unit="cues"):
+    best = min(runs)
+    return {"runs": [round(r, 6) for r in runs], "best": round(best, 6),
+            "median": round(statistics.median(runs), 6), "items": items, "unit": unit,
+            "per_second": round(items / best, 1) if best else None}
+
+def run_benchmark(workdir, files=10, cues=500, encodings=("utf-8",), seed=0, repeat=3,
+                  src_code="en", dst_code="fr", latency=0.0, workers=None, **corpus_options):
+    """Run every stage in workdir; returns the JSON-ready result dict."""
+    source_dir = os.path.join(workdir, "source")
+    work_dir = os.path.join(workdir, "work")
+    out_dir = os.path.join(workdir, "out")
+    os.makedirs(out_dir, exist_ok=True)
+    sources = generate_corpus(source_dir, files, encodings, seed, cues=cues, **corpus_options)
+    paths = [os.path.join(work_dir, os.path.basename(p)) for p in sources]
+    corpus_bytes = sum(os.path.getsize(p) for p in sources)
+    stages = {}
+
+    # convert_to_utf8 rewrites in place, so every run starts from fresh copies
+    def copy_sources():
+        shutil.rmtree(work_dir, ignore_errors=True)
+        shutil.copytree(source_dir, work_dir)
+    runs, _ = _timed(lambda: [engine.convert_to_utf8(p) for p in paths], repeat, copy_sources)
+    stages["convert"] = _stage(runs, corpus_bytes, "bytes")
+    runs, _ = _timed(lambda: engine.convert_files(paths, workers=workers), repeat, copy_sources)
+    stages["convert_parallel"] = _stage(runs, corpus_bytes, "bytes")
+
+    runs, parsed = _timed(lambda: [engine._load_srt(p)[0] for p in paths], repeat)
+    texts = [s.text for subs in parsed for s in subs]
+    total_cues = len(texts)
+    stages["parse"] = _stage(runs, total_cues)
+    if pysrt:
+        docs = []
+        for p in paths:
+            with open(p, "rb") as f:
+                docs.append(f.read().decode("utf-8-sig"))
+        runs, _ = _timed(lambda: [pysrt.from_string(d) for d in docs], repeat)
+        stages["parse_pysrt"] = _stage(runs, total_cues)
+
+    runs, _ = _timed(lambda: [_regex_chain_clean_text(t) for t in texts], repeat)
+    stages["clean_text_regex_chain"] = _stage(runs, total_cues)
+    runs, _ = _timed(lambda: [engine.clean_text(t) for t in texts], repeat)
+    stages["clean_text"] = _stage(runs, total_cues)
+    runs, protected = _timed(lambda: [protect(t) for t in texts], repeat)
+    stages["protect_markup"] = _stage(runs, total_cues)
+    runs, _ = _timed(lambda: [restore(t, m) for t, m in protected], repeat)
+    stages["restore_markup"] = _stage(runs, total_cues)
+    runs, _ = _timed(lambda: [detect(t) for t, _ in protected], repeat)
+    stages["langid"] = _stage(runs, total_cues)
+
+    max_chars, max_lines, _ = engine.batch_settings(dst_code)
+    def batch_all():
+        batches = []
+        for subs in parsed:
+            batches += pack_batches(list(engine.group_cues(subs)[0]), max_chars, max_lines, measure=utf8_len)
+        return batches
+    runs, batches = _timed(batch_all, repeat)
+    stages["batching"] = _stage(runs, total_cues)
+    unique = sum(len(b) for b in batches)
+
+    server, url = start_stub_server(latency=latency, seed=seed)
+    try:
+        def translate_all():
+            backend = make_backend(src_code, dst_code, url=url)
+            try:
+                return list(engine.translate_files(paths, src_code, dst_code, max_workers=workers,
+                                                   backend=backend))
+            finally:
+                backend.close()
+        runs, translated = _timed(translate_all, repeat)
+        requests = server.options.counts["requests"] // repeat
+    finally:
+        server.shutdown()
+        server.server_close()
+    stages["translate"] = _stage(runs, total_cues)
+    stages["translate"]["requests"] = requests
+
+    runs, _ = _timed(lambda: [engine.save_translated(p, subs, dst_code, out_dir) for p, subs in translated], repeat)
+    stages["write"] = _stage(runs, total_cues)
+
+    return {
+        "version": 1,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"files": files, "cues": cues, "encodings": list(encodings), "seed": seed,
+                   "repeat": repeat, "src": src_code, "dst": dst_code, "latency": latency,
+                   "workers": workers, **corpus_options},
+        "corpus": {"files": files, "cues": total_cues, "unique_texts": unique, "bytes": corpus_bytes},
+        "stages": stages,
+    }
+
+def _series_total(snapshot, name, **labels):
+    """Sum of a counter (value) or histogram (count) over series matching labels."""
+    total = 0
+    for entry in snapshot["metrics"].get(name, {}).get("series", []):
+        if all(entry["labels"].get(k) == v for k, v in labels.items()):
+            total += entry.get("value", entry.get("count", 0))
+    return total
+
+def run_protocol_benchmark(workdir, files=10, cues=500, encodings=("utf-8",), seed=0, src_code="en",
+                           dst_code="fr", latency=0.0, workers=None, mangle=0.05, protocols=None,
+                           **corpus_options):
+    """Translate the same corpus with each segment protocol; returns the JSON-ready result dict."""
+    protocols = protocols or list(PROTOCOLS)
+    paths = generate_corpus(os.path.join(workdir, "source"), files, encodings, seed, cues=cues, **corpus_options)
+    for p in paths:
+        engine.convert_to_utf8(p)
+    results = {}
+    for name in protocols:
+        # Fresh server per protocol: the same seed damages the same share of responses
+        server, url = start_stub_server(latency=latency, seed=seed, mangle=mangle)
+        metrics = Metrics()
+        payload_chars = [0]
+        text_chars = [0]
+        try:
+            backend = make_backend(src_code, dst_code, url=url, protocol=name)
+            send = backend.translate
+            split = backend.translate_batch
+            def translate(text, target=None, source=None):
+                payload_chars[0] += len(text)
+                return send(text, target, source)
+            def translate_batch(texts, target=None, source=None):
+                text_chars[0] += sum(len(t) for t in texts)
+                return split(texts, target, source)
+            backend.translate, backend.translate_batch = translate, translate_batch
+            try:
+                start = time.perf_counter()
+                for _ in engine.translate_files(paths, src_code, dst_code, max_workers=workers,
+                                                backend=backend, metrics=metrics):
+                    pass
+                elapsed = time.perf_counter() - start
+            finally:
+                backend.close()
+            counts = dict(server.options.counts)
+        finally:
+            server.shutdown()
+            server.server_close()
+        snapshot = metrics.snapshot()
+        requests = counts["requests"]
+        mismatches = _series_total(snapshot, "translator_request_seconds", outcome="split_mismatch")
+        overhead = payload_chars[0] - text_chars[0]
+        results[name] = {
+            "seconds": round(elapsed, 6),
+            "requests": requests,
+            "mangled_responses": counts["mangled"],
+            "overhead_chars": overhead,
+            "overhead_per_request": round(overhead / requests, 1) if requests else None,
+            "overhead_share": round(overhead / payload_chars[0], 4) if payload_chars[0] else None,
+            "split_mismatches": mismatches,
+            "split_mismatch_rate": round(mismatches / requests, 4) if requests else None,
+            "bisections": _series_total(snapshot, "translator_bisections_total"),
+            "partial_failures": _series_total(snapshot, "translator_partial_failures_total"),
+        }
+    return {
+        "version": 1,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"files": files, "cues": cues, "encodings": list(encodings), "seed": seed,
+                   "src": src_code, "dst": dst_code, "latency": latency, "workers": workers,
+                   "mangle": mangle, **corpus_options},
+        "protocols": results,
+    }
+
+def compare(result, baseline, threshold=0.2):
+    """[(stage, baseline best, current best, ratio, regressed)] for stages present in both."""
+    rows = []
+    for name, stage in result.get("stages", {}).items():
+        base = baseline.get("stages", {}).get(name)
+        if not base or not base.get("best"):
+            continue
+        ratio = stage["best"] / base["best"]
+        rows.append((name, base["best"], stage["best"], ratio, ratio > 1 + threshold))
+    return rows
+
+# -------------------------------------------------
+# Command line
+# -------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m subtitle_translator.bench",
+                                     description="Time each pipeline stage on a synthetic SRT corpus.")
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument("--cues", type=int, default=500, help="cues per file")
+    parser.add_argument("--min-words", type=int, default=3)
+    parser.add_argument("--max-words", type=int, default=10)
+    parser.add_argument("--two-line-rate", type=float, default=0.3, help="share of cues with two lines")
+    parser.add_argument("--tag-rate", type=float, default=0.1, help="share of cues with <i>/{\\an8}/<font> markup")
+    parser.add_argument("--dup-rate", type=float, default=0.2, help="share of cues repeating an earlier text")
+    parser.add_argument("--encodings", default="utf-8,utf-8-sig,cp1252,latin-1",
+                        help="comma-separated; files cycle through them")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; best and median are reported")
+    parser.add_argument("-s", "--source", default="en")
+    parser.add_argument("-t", "--target", default="fr")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub server latency per request (seconds)")
+    parser.add_argument("-w", "--workers", type=int, default=None)
+    parser.add_argument("--workdir", help="keep the corpus and output here instead of a temp dir")
+    parser.add_argument("-o", "--output", help="write the JSON here instead of stdout")
+    parser.add_argument("--compare", metavar="BASELINE", help="JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown per stage for --compare (0.2 = 20%%)")
+    parser.add_argument("--protocols", metavar="NAMES",
+                        help=f"compare segment protocols instead of timing stages ({','.join(PROTOCOLS)})")
+    parser.add_argument("--mangle", type=float, default=0.05,
+                        help="share of stub responses with a damaged boundary for --protocols")
+    args = parser.parse_args(argv)
+
+    options = dict(files=args.files, cues=args.cues, encodings=args.encodings.split(","), seed=args.seed,
+                   repeat=max(1, args.repeat), src_code=args.source, dst_code=args.target,
+                   latency=args.latency, workers=args.workers, min_words=args.min_words,
+                   max_words=args.max_words, two_line_rate=args.two_line_rate, tag_rate=args.tag_rate,
+                   dup_rate=args.dup_rate)
+    run = run_benchmark
+    if args.protocols:
+        options.pop("repeat")
+        options.update(mangle=args.mangle, protocols=args.protocols.split(","))
+        run = run_protocol_benchmark
+    if args.workdir:
+        result = run(args.workdir, **options)
+    else:
+        with tempfile.TemporaryDirectory(prefix="subtitle_bench_") as workdir:
+            result = run(workdir, **options)
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        sys.stdout.write(text + "\n")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressed = False
+        for name, before, after, ratio, slower in compare(result, baseline, args.threshold):
+            sys.stderr.write(f"{name:<11} {before:9.4f}s -> {after:9.4f}s  {ratio - 1:+.0%}"
+                             f"{'  REGRESSION' if slower else ''}\n")
+            regressed |= slower
+        return 1 if regressed else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk translation memory (SQLite).
+Keyed by (source code, target code, normalized cue text) so repeated lines
+("What?", intro credits, ...) are only sent to the translator once.
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import threading
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+def default_cache_path():
+    if sys.platform == "win32":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "subtitle_translator", "memory.sqlite3")
+
+class TranslationMemory:
+    """Thread-safe; one connection shared by all batch workers."""
+
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path or default_cache_path()
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS memory (
+            src TEXT NOT NULL, dst TEXT NOT NULL, text TEXT NOT NULL,
+            translation TEXT NOT NULL, size INTEGER NOT NULL, used REAL NOT NULL,
+            PRIMARY KEY (src, dst, text))""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS memory_used ON memory(used)")
+        self._size = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM memory").fetchone()[0]
+
+    def get_many(self, src, dst, texts):
+        """Return {text: translation} for every text already in memory."""
+        found = {}
+        unique = list(dict.fromkeys(texts))
+        with self._lock:
+            # SQLite caps bound parameters; 500 keeps well under the limit
+            for i in range(0, len(unique), 500):
+                chunk = unique[i:i + 500]
+                marks = ",".join("?" * len(chunk))
+                rows = self._db.execute(
+                    f"SELECT text, translation FROM memory WHERE src=? AND dst=? AND text IN ({marks})",
+                    [src, dst] + chunk).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._db.executemany("UPDATE memory SET used=? WHERE src=? AND dst=? AND text=?",
+                                     [(now, src, dst, t) for t in found])
+            self.hits += sum(1 for t in texts if t in found)
+            self.misses += sum(1 for t in texts if t not in found)
+        return found
+
+    def put_many(self, src, dst, pairs):
+        """Store (text, translation) pairs, evicting least recently used rows past max_bytes."""
+        if not pairs: return
+        now = time.time()
+        rows = [(src, dst, t, tr, len(t.encode("utf-8")) + len(tr.encode("utf-8")), now) for t, tr in pairs]
+        with self._lock:
+            self._db.execute("BEGIN")
+            for row in rows:
+                old = self._db.execute("SELECT size FROM memory WHERE src=? AND dst=? AND text=?",
+                                       row[:3]).fetchone()
+                self._db.execute("INSERT OR REPLACE INTO memory VALUES (?, ?, ?, ?, ?, ?)", row)
+                self._size += row[4] - (old[0] if old else 0)
+            self._db.execute("COMMIT")
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # Trim to 90% so eviction doesn't run on every put once full
+        target = int(self.max_bytes * 0.9)
+        cur = self._db.execute("SELECT rowid, size FROM memory ORDER BY used")
+        doomed = []
+        size = self._size
+        for rowid, row_size in cur:
+            if size <= target: break
+            doomed.append((rowid,))
+            size -= row_size
+        cur.close()
+        self._db.executemany("DELETE FROM memory WHERE rowid=?", doomed)
+        self._size = size
+        self.evictions += len(doomed)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0, "bytes": self._size}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
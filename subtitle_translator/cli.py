@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Command line front-end for the headless engine.
+
+    python -m subtitle_translator translate -s auto -t si "season1/*.srt" -o out
+    python -m subtitle_translator translate -t si,fr,de,es "season1/*.srt" -o out
+    python -m subtitle_translator convert "legacy/**/*.srt"
+    python -m subtitle_translator extract "videos/*.mkv" -o subs
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+
+from . import engine
+from .cache import TranslationMemory, DEFAULT_MAX_BYTES
+from .limiter import AdaptiveLimiter
+from .backends import make_backend, DEFAULT_TIMEOUT
+from .segments import PROTOCOLS, DEFAULT_PROTOCOL
+from .passthrough import CueClassifier, load_table
+from .journal import JobJournal
+from .metrics import Metrics, serve_metrics
+from .tracing import Tracer
+
+def expand_paths(patterns):
+    """Expand shell-style globs (** is recursive); keeps order, drops duplicates."""
+    paths = []
+    seen = set()
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern, recursive=True)) if glob.has_magic(pattern) else [pattern]
+        for p in matches:
+            if os.path.isfile(p) and p not in seen:
+                seen.add(p)
+                paths.append(p)
+    return paths
+
+def _make_reporter(verbose):
+    def report(msg_type, payload):
+        if msg_type == "log":
+            sys.stderr.write(payload)
+        elif msg_type == "error":
+            sys.stderr.write(f"{payload}\n")
+        elif msg_type == "file_error":
+            path, e = payload
+            sys.stderr.write(f"Cannot open {path}: {e}\n")
+        elif msg_type == "status" and verbose:
+            sys.stderr.write(f"{payload}\n")
+    return report
+
+def cmd_translate(args):
+    paths = expand_paths(args.files)
+    if not paths:
+        sys.stderr.write("No input files matched.\n")
+        return 1
+    src_code = engine.lang_code(args.source)
+    dst_codes = list(dict.fromkeys(engine.lang_code(t.strip()) for arg in args.target
+                                   for t in arg.split(",") if t.strip()))
+    report = _make_reporter(args.verbose)
+    memory = None
+    if not args.no_cache:
+        memory = TranslationMemory(args.cache_path, max_bytes=int(args.cache_size_mb * 1024 * 1024))
+    classifier = CueClassifier(sound_tags=args.sound_tags, patterns=args.sound_tag_pattern,
+                               table=load_table(args.sound_tag_table) if args.sound_tag_table else None)
+    max_workers = args.workers or engine.MAX_WORKERS_LIMIT
+    if args.fixed_workers:
+        limiter = AdaptiveLimiter(initial=max_workers, min_limit=max_workers, max_limit=max_workers)
+    else:
+        initial = min(engine.batch_settings(code)[2] for code in dst_codes)
+        limiter = AdaptiveLimiter(initial=min(initial, max_workers), max_limit=max_workers)
+    backend = make_backend(src_code, dst_codes[0], pool_size=limiter.max_limit, url=args.backend_url,
+                           timeout=args.request_timeout, protocol=args.segment_protocol)
+    journal = JobJournal(args.journal) if args.journal else None
+    if journal and journal.replayed:
+        sys.stderr.write(f"Resuming from {args.journal} ({journal.replayed} batches journaled)\n")
+    metrics = Metrics() if args.metrics_file or args.metrics_port is not None else None
+    metrics_server = None
+    if args.metrics_port is not None:
+        metrics_server, url = serve_metrics(metrics, port=args.metrics_port)
+        sys.stderr.write(f"Metrics on {url} (JSON: {url}.json)\n")
+    tracer = Tracer() if args.trace else None
+    saved = incomplete = 0
+    last_write = 0.0
+    try:
+        for path, code, save_path, error, failed in engine.stream_translate(
+                paths, src_code, dst_codes, args.output_dir,
+                batch_size=args.batch_size, max_chars=args.max_chars, count_bytes=args.count_bytes,
+                report=report, memory=memory, limiter=limiter, retries=args.retries,
+                max_open_files=args.prefetch, backend=backend, journal=journal, metrics=metrics,
+                tracer=tracer, merge_gap=args.merge_gap if args.merge_sentences else None,
+                detect_language=args.detect_language, classifier=classifier):
+            if error is None and not failed:
+                saved += 1
+            elif error is None:
+                incomplete += 1
+            # Refresh the snapshot as files finish, at most once a second
+            if args.metrics_file and time.monotonic() - last_write >= 1.0:
+                metrics.write_json(args.metrics_file)
+                last_write = time.monotonic()
+    finally:
+        backend.close()
+        if args.metrics_file:
+            metrics.write_json(args.metrics_file)
+        if metrics_server:
+            metrics_server.shutdown()
+            metrics_server.server_close()
+        if tracer:
+            tracer.write(args.trace)
+        if journal:
+            journal.close()
+        if memory:
+            memory.close()
+        if args.limiter_log:
+            with open(args.limiter_log, "w", encoding="utf-8") as f:
+                json.dump(limiter.snapshot(), f, indent=2)
+    expected = len(paths) * len(dst_codes)
+    sys.stderr.write(f"Translated {saved}/{expected} files.\n")
+    if incomplete:
+        sys.stderr.write(f"{incomplete} saved with untranslated lines; run again to retry them.\n")
+    if journal and saved == expected and not args.keep_journal:
+        journal.discard()
+    return 0 if saved == expected else 2
+
+def cmd_convert(args):
+    paths = expand_paths(args.files)
+    if not paths:
+        sys.stderr.write("No input files matched.\n")
+        return 1
+    success = engine.convert_files(paths, report=_make_reporter(args.verbose), workers=args.workers)
+    return 0 if success == len(paths) else 2
+
+def cmd_extract(args):
+    paths = expand_paths(args.files)
+    if not paths:
+        sys.stderr.write("No input files matched.\n")
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+    engine.extract_files(paths, args.output_dir, report=_make_reporter(args.verbose))
+    return 0
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m subtitle_translator",
+                                     description="Translate, convert and extract subtitles without the GUI.")
+    parser.add_argument("-v", "--verbose", action="store_true", help="print per-batch status lines")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    tr = sub.add_parser("translate", help="translate .srt files")
+    tr.add_argument("files", nargs="+", help="files or glob patterns")
+    tr.add_argument("-s", "--source", default="auto", help="source language name or code (default: auto)")
+    tr.add_argument("-t", "--target", required=True, action="append",
+                    help="target language name or code; repeat or comma-separate for several (-t si,fr,de)")
+    tr.add_argument("-o", "--output-dir", default=None, help="output folder (default: next to input)")
+    tr.add_argument("-b", "--batch-size", type=int, default=None, help="max lines per request (default: 50, CJK 20)")
+    tr.add_argument("-c", "--max-chars", type=int, default=None,
+                    help="character budget per request, delimiters included (default: 4500, CJK 2000)")
+    tr.add_argument("--count-bytes", action="store_true", help="apply --max-chars to UTF-8 bytes instead of characters")
+    tr.add_argument("-w", "--workers", type=int, default=None,
+                    help="max parallel requests; the adaptive limit starts at 5 (CJK 3) and moves up to this (default: 16)")
+    tr.add_argument("--fixed-workers", action="store_true", help="disable adaptation and always run --workers requests")
+    tr.add_argument("--limiter-log", default=None, help="write the concurrency limit history as JSON to this file")
+    tr.add_argument("--merge-sentences", action="store_true",
+                    help="send a sentence split over consecutive cues as one segment and split the translation back")
+    tr.add_argument("--merge-gap", type=int, default=engine.DEFAULT_MERGE_GAP_MS,
+                    help="largest gap in ms between cues of one sentence for --merge-sentences (default: 1000)")
+    tr.add_argument("--detect-language", action="store_true",
+                    help="identify languages offline: pin an Auto source per file and keep lines "
+                         "already in the target language instead of sending them")
+    tr.add_argument("--sound-tags", action="store_true",
+                    help="keep cues that are only sound tags ([DOOR SLAMS], (sighs)) without sending them")
+    tr.add_argument("--sound-tag-pattern", action="append", default=None, metavar="REGEX",
+                    help="regex for one sound tag, repeatable (default: [...] and (...))")
+    tr.add_argument("--sound-tag-table", default=None, metavar="JSON",
+                    help='map sound tags per target instead of copying them: {"fr": {"[door slams]": "[PORTE]"}}; '
+                         "implies --sound-tags")
+    tr.add_argument("--prefetch", type=int, default=engine.DEFAULT_OPEN_FILES,
+                    help="files parsed ahead and translated concurrently (default: 4)")
+    tr.add_argument("--backend-url", default=None,
+                    help="Google-compatible endpoint, e.g. the local stub server (http://127.0.0.1:8765/m)")
+    tr.add_argument("--segment-protocol", choices=sorted(PROTOCOLS), default=DEFAULT_PROTOCOL,
+                    help="how lines are joined into one request: compact [[n]] markers or the legacy delimiter "
+                         "(default: markers)")
+    tr.add_argument("--journal", default=None,
+                    help="checkpoint file; re-running with the same file skips batches already done")
+    tr.add_argument("--keep-journal", action="store_true", help="keep the journal after a fully successful run")
+    tr.add_argument("--request-timeout", type=float, default=DEFAULT_TIMEOUT,
+                    help="hard deadline per HTTP request in seconds; late requests are aborted and retried (default: 30)")
+    tr.add_argument("--retries", type=int, default=engine.DEFAULT_RETRIES,
+                    help="retries per request on transient errors, with jittered backoff (default: 4)")
+    tr.add_argument("--metrics-file", default=None,
+                    help="write a JSON metrics snapshot here as files finish and at the end")
+    tr.add_argument("--metrics-port", type=int, default=None,
+                    help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics while running")
+    tr.add_argument("--trace", default=None,
+                    help="write a Chrome trace-event file (chrome://tracing, ui.perfetto.dev) of the run")
+    tr.add_argument("--no-cache", action="store_true", help="don't read or write the translation memory")
+    tr.add_argument("--cache-path", default=None, help="translation memory file (default: user cache dir)")
+    tr.add_argument("--cache-size-mb", type=float, default=DEFAULT_MAX_BYTES / (1024 * 1024),
+                    help="evict least recently used entries past this size (default: 64)")
+    tr.set_defaults(func=cmd_translate)
+
+    cv = sub.add_parser("convert", help="convert .srt files to UTF-8 in place")
+    cv.add_argument("files", nargs="+", help="files or glob patterns")
+    cv.add_argument("-w", "--workers", type=int, default=None,
+                    help="worker processes for encoding detection (default: one per CPU core)")
+    cv.set_defaults(func=cmd_convert)
+
+    ex = sub.add_parser("extract", help="extract English subtitle tracks from video files")
+    ex.add_argument("files", nargs="+", help="files or glob patterns")
+    ex.add_argument("-o", "--output-dir", required=True, help="output folder")
+    ex.set_defaults(func=cmd_extract)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except ValueError as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Encoding detection for subtitle files, done once per file and cheaply:
+
+1. A BOM decides it outright.
+2. Text that decodes as strict UTF-8 is UTF-8 (most files; C-speed check).
+3. Otherwise the detector looks at a leading sample only. If it is
+   confident and the whole file decodes with its answer, that's it.
+4. Anything else falls back to a full scan of the file.
+
+charset_normalizer is used when installed, chardet otherwise.
+"""
+
+import re
+import codecs
+
+from .langid import plausibility, script
+
+try:
+    from charset_normalizer import from_bytes
+    from charset_normalizer.utils import is_multi_byte_encoding
+    _USE_NORMALIZER = True
+except Exception:
+    import chardet
+    _USE_NORMALIZER = False
+
+# Leading bytes handed to the detector before trying a full scan
+SAMPLE_BYTES = 64 * 1024
+# charset_normalizer: highest "chaos" (0 = clean text) accepted from a sample
+MAX_SAMPLE_CHAOS = 0.1
+# chardet: lowest confidence accepted from a sample
+MIN_SAMPLE_CONFIDENCE = 0.9
+# Code pages this close to the best chaos are re-ranked by how the text reads
+CHAOS_TIE = 0.1
+TIE_SAMPLE_BYTES = 4 * 1024
+
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+
+# Longest first: the UTF-32 LE BOM starts with the UTF-16 LE one
+_BOMS = [
+    (codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"),
+]
+
+def _guess(data, confident_only=False):
+    """Detector's encoding for data; with confident_only, None unless it is sure."""
+    if _USE_NORMALIZER:
+        results = list(from_bytes(data))
+        if not results or (confident_only and results[0].chaos > MAX_SAMPLE_CHAOS):
+            return None
+        return _break_tie(data, results)
+    result = chardet.detect(data)
+    if confident_only and (result["confidence"] or 0) < MIN_SAMPLE_CONFIDENCE:
+        return None
+    return result["encoding"]
+
+def _break_tie(data, results):
+    """
+    Latin code pages often score alike (cp1252 French comes back as
+    cp1257, "façade" as "faēade"); among those within CHAOS_TIE of the best,
+    take the one whose decoded text fits a language profile best. Greek,
+    Cyrillic, Arabic... winners are left as the detector ranked them.
+    """
+    best = results[0]
+    if is_multi_byte_encoding(best.encoding):
+        return best.encoding
+    # Code pages only differ on non-ASCII bytes: score just the lines that have some
+    sample = b"\n".join(line for line in data[:64 * TIE_SAMPLE_BYTES].split(b"\n")
+                        if not line.isascii())[:TIE_SAMPLE_BYTES]
+    scored = []
+    decoded = set()
+    for rank, r in enumerate(results[:6]):
+        if r.chaos > best.chaos + CHAOS_TIE or is_multi_byte_encoding(r.encoding):
+            continue
+        text = sample.decode(r.encoding, errors="replace")
+        if text in decoded:
+            continue    # same characters as a better-ranked code page
+        decoded.add(text)
+        if script("".join(_NON_ASCII_RE.findall(text))) != "latin":
+            if rank == 0:
+                return best.encoding
+            continue
+        score = plausibility(text)
+        if score is not None:
+            scored.append((score, -rank, r.encoding))
+    return max(scored)[2] if scored else best.encoding
+
+def _decodes(data, encoding):
+    # final=False: a multi-byte character cut off at the end of a truncated file is fine
+    try:
+        codecs.getincrementaldecoder(encoding)().decode(data, final=False)
+        return True
+    except (UnicodeDecodeError, LookupError):
+        return False
+
+def detect_bytes(data, sample_bytes=SAMPLE_BYTES):
+    """(encoding, method) with method one of "bom", "utf-8", "sample", "full"."""
+    for bom, encoding in _BOMS:
+        if data.startswith(bom):
+            return encoding, "bom"
+    if _decodes(data, "utf-8"):
+        return "utf-8", "utf-8"
+    guess = None
+    if len(data) > sample_bytes:
+        guess = _guess(data[:sample_bytes], confident_only=True)
+        if guess and _decodes(data, guess):
+            return guess, "sample"
+    return _guess(data) or guess or "utf-8", "full"
@@ -0,0 +1,840 @@
+# -*- coding: utf-8 -*-
+"""
+Headless translation / conversion / extraction engine.
+Used by the GUI (Translator_1.0.3.py) and by the command line
+(python -m subtitle_translator).
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import queue
+import threading
+import subprocess
+from threading import Thread
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+
+from deep_translator.exceptions import (
+    NotValidLength, NotValidPayload, LanguageNotSupportedException, InvalidSourceOrTargetLanguage,
+)
+
+from .batching import (
+    pack_batches, utf8_len, DELIMITER_OVERHEAD,
+    DEFAULT_MAX_CHARS, DEFAULT_MAX_LINES, CJK_MAX_CHARS, CJK_MAX_LINES,
+)
+from .limiter import AdaptiveLimiter
+from .retry import retry_call, DEFAULT_RETRIES
+from .backends import make_backend, SplitMismatch
+from .journal import file_digest
+from .metrics import NULL_METRICS, LATENCY_BUCKETS, LINES_BUCKETS, CHARS_BUCKETS, RATE_BUCKETS
+from .tracing import NULL_TRACER
+from .markup import clean_text, protect, restore
+from . import srt
+from .sentences import find_runs, split_translation, DEFAULT_MERGE_GAP_MS
+from .langid import detect, detect_file, same_language
+from .passthrough import DEFAULT_CLASSIFIER, RULES
+from .encoding import detect_bytes
+
+# Ceiling for the adaptive in-flight request limit
+MAX_WORKERS_LIMIT = 16
+# Files parsed ahead of the translator (bounds memory on huge selections)
+DEFAULT_OPEN_FILES = 4
+# Recent translations reused across files of a run (LRU); older repeats come from the cache
+SEEN_MAX_LINES = 20000
+# Below this many files the UTF-8 converter doesn't start worker processes
+PARALLEL_CONVERT_MIN_FILES = 8
+
+# -------------------------------------------------
+# Resource Path for PyInstaller (Icon + FFmpeg)
+# -------------------------------------------------
+def resource_path(relative_path):
+    try:
+        base_path = sys._MEIPASS
+    except Exception:
+        base_path = os.path.abspath(".")
+    return os.path.join(base_path, relative_path)
+
+def _tool_path(name):
+    # Bundled .exe first (Windows / PyInstaller), then whatever is on PATH
+    bundled = resource_path(f"{name}.exe")
+    if os.path.exists(bundled):
+        return bundled
+    return shutil.which(name) or bundled
+
+FFMPEG_PATH = _tool_path("ffmpeg")
+FFPROBE_PATH = _tool_path("ffprobe")
+CREATE_NO_WINDOW = 0x08000000 if sys.platform == "win32" else 0
+
+# -------------------------------------------------
+# Languages
+# -------------------------------------------------
+LANGUAGES = {
+    "English": "en", "Sinhala": "si", "Arabic": "ar", "Dutch": "nl",
+    "French": "fr", "German": "de", "Italian": "it", "Polish": "pl",
+    "Romanian": "ro", "Greek": "el", "Hungarian": "hu", "Swedish": "sv",
+    "Danish": "da", "Finnish": "fi", "Norwegian": "no", "Czech": "cs",
+    "Croatian": "hr", "Ukrainian": "uk", "Indonesian": "id", "Malay": "ms",
+    "Filipino": "tl", "Japanese": "ja", "Korean": "ko", "Turkish": "tr",
+    "Russian": "ru", "Chinese (Simplified)": "zh-CN", "Chinese (Traditional)": "zh-TW",
+    "Vietnamese": "vi", "Thai": "th", "Portuguese": "pt", "Spanish": "es",
+    "Hindi": "hi", "Bengali": "bn"
+}
+
+SRC_LANGS = ["Auto"] + sorted(LANGUAGES.keys())
+ALL_DEST_LANGS = sorted(LANGUAGES.keys())
+CJK_LANGUAGES = {"Chinese (Simplified)", "Chinese (Traditional)", "Japanese", "Korean", "Thai", "Vietnamese"}
+CJK_CODES = {LANGUAGES[l] for l in CJK_LANGUAGES}
+
+def lang_code(value):
+    """Accept a display name ("Sinhala"), a code ("si") or "Auto"."""
+    if value.lower() == "auto":
+        return "auto"
+    if value in LANGUAGES:
+        return LANGUAGES[value]
+    for code in LANGUAGES.values():
+        if code.lower() == value.lower():
+            return code
+    raise ValueError(f"Unknown language: {value}")
+
+def batch_settings(dst_code):
+    """(MAX_CHARS, MAX_LINES, initial workers) for a target language; CJK gets smaller batches."""
+    if dst_code in CJK_CODES:
+        return CJK_MAX_CHARS, CJK_MAX_LINES, 3
+    return DEFAULT_MAX_CHARS, DEFAULT_MAX_LINES, 5
+
+# -------------------------------------------------
+# Helpers
+# -------------------------------------------------
+def _noop(msg_type, payload):
+    pass
+
+# Errors that will fail the same way every time; everything else
+# (429, 5xx, connection resets, empty responses) is worth retrying
+PERMANENT_ERRORS = (NotValidLength, NotValidPayload, LanguageNotSupportedException,
+                    InvalidSourceOrTargetLanguage, ValueError)
+
+def is_transient(error):
+    return not isinstance(error, PERMANENT_ERRORS)
+
+# -------------------------------------------------
+# Translation
+# -------------------------------------------------
+def group_cues(subs, merge_gap=None, classifier=None):
+    """
+    ({normalized text: [cue indices]} for every non-empty cue in first-seen
+    order, [markup.Markup or None per cue], {first cue: [(cue, source length)]}).
+    Cues differing only in their outer tags share a text; restore() puts each
+    cue's own tags back. With merge_gap (ms), a sentence running over
+    consecutive cues becomes one text listed under its first cue; the last
+    dict says how to split its translation back. Cues the classifier
+    (passthrough.CueClassifier) keeps without a request are never merged.
+    """
+    texts = [""] * len(subs)
+    markup = [None] * len(subs)
+    for i, s in enumerate(subs):
+        if s.text.strip():
+            texts[i], markup[i] = protect(s.text)
+    spans = {}
+    if merge_gap is not None:
+        kept = {i for i, t in enumerate(texts) if t and classifier and classifier.classify(t)}
+        for run in find_runs(subs, texts, markup, merge_gap, kept=kept):
+            spans[run[0]] = [(i, len(texts[i])) for i in run]
+            texts[run[0]] = " ".join(texts[i] for i in run)
+            for i in run[1:]:
+                texts[i] = None
+    groups = {}
+    for i, s in enumerate(subs):
+        if texts[i] is not None and s.text.strip():
+            groups.setdefault(texts[i], []).append(i)
+    return groups, markup, spans
+
+class FileJob:
+    """One parsed file moving through the shared pipeline, for every target language."""
+
+    def __init__(self, no, path, subs, dst_codes, digest=None, merge_gap=None, src_code="auto",
+                 detect_language=False, classifier=DEFAULT_CLASSIFIER):
+        self.no = no
+        self.path = path
+        self.subs = subs
+        self.groups, self.markup, self.spans = group_cues(subs, merge_gap, classifier)
+        # Texts that skip the translator: {text: passthrough rule}
+        self.rule = {}
+        for t in self.groups:
+            rule = classifier.classify(t) if t else None
+            if rule:
+                self.rule[t] = rule
+        # With detection, "auto" is pinned to the file's language and every
+        # text gets its own language (None if too short or unclear)
+        self.src = src_code
+        self.lang = {}
+        if detect_language:
+            if src_code == "auto":
+                self.src = detect_file(self.groups) or "auto"
+            self.lang = {t: detect(t) for t in self.groups if t and t not in self.rule}
+        # sha1 of the source file, for the resume journal; merged runs are journaled
+        # under their first cue, so they get their own key
+        self.digest = f"{digest}:merged" if digest and self.spans else digest
+        # Cues behind each text (a merged run counts all of its cues)
+        self.weight = {t: sum(len(self.spans[i]) if i in self.spans else 1 for i in idx)
+                       for t, idx in self.groups.items()}
+        self.total = sum(self.weight.values())
+        self.out = {code: [""] * len(subs) for code in dst_codes}
+        self.done = {code: 0 for code in dst_codes}
+        self.waiting = {code: 0 for code in dst_codes}     # unique texts still in flight
+        self.pending = set(dst_codes)                       # languages not yet yielded
+        self.started = time.monotonic()
+        merged = sum(len(span) for span in self.spans.values())
+        # deduped: segments that went through dedup (not resumed, in the target or kept locally)
+        self.stats = {code: {"lines": self.total, "deduped": 0, "unique": 0, "requests": 0, "retries": 0,
+                             "bisections": 0,
+                             "resumed": 0, "merged": merged, "in_target": 0, "failed": 0,
+                             **dict.fromkeys(RULES, 0)}
+                      for code in dst_codes}
+
+    def fill(self, code, text, translation):
+        # None (failed batch) keeps each cue's original text
+        if translation is not None:
+            out = self.out[code]
+            for i in self.groups[text]:
+                span = self.spans.get(i)
+                if span is None:
+                    out[i] = translation
+                    continue
+                for (j, _), part in zip(span, split_translation(translation, [n for _, n in span])):
+                    out[j] = part
+        self.done[code] += self.weight[text]
+
+    def result(self, code):
+        out = self.out.pop(code)
+        return [srt.Cue(s.index, s.start, s.end, restore(out[i], self.markup[i]) if out[i] else s.text,
+                        getattr(s, "position", "")) for i, s in enumerate(self.subs)]
+
+def _make_limiter(dst_codes, max_workers):
+    if isinstance(dst_codes, str):
+        dst_codes = [dst_codes]
+    max_workers = max_workers or MAX_WORKERS_LIMIT
+    initial = min(batch_settings(code)[2] for code in dst_codes)
+    return AdaptiveLimiter(initial=min(initial, max_workers), max_limit=max_workers)
+
+def _load_srt(path):
+    """(subs, sha1) - the digest ties journal entries to the exact file contents."""
+    with open(path, "rb") as f:
+        data = f.read()
+    return srt.parse(data.decode("utf-8-sig")), file_digest(data)
+
+# Progress is reported through report(msg_type, payload), the same
+# (type, payload) tuples the GUI queues carry:
+#   ("status", text)            per-batch status line
+#   ("progress", fraction)      overall progress 0..1
+#   ("error", text)             non-fatal batch error
+#   ("file_error", (path, e))   file could not be opened
+#   ("log", text)               one line per finished file and language
+def _run_pipeline(sources, src_code, dst_codes, batch_size=None, max_chars=None, count_bytes=False,
+                  limiter=None, retries=DEFAULT_RETRIES, memory=None, report=None,
+                  max_open_files=DEFAULT_OPEN_FILES, backend=None, journal=None, metrics=None,
+                  tracer=None, merge_gap=None, detect_language=False, classifier=None):
+    """
+    One continuous pipeline over every (file, target language) pair: a
+    parser thread reads and cleans files ahead (at most max_open_files parsed
+    but unfinished), all batches share one worker pool, and each pair is
+    yielded as (path, dst_code, subs, failed) the moment its last batch
+    returns - there is no per-file or per-language barrier. Parsing,
+    clean_text, dedup and packing happen once per file however many targets
+    there are. failed counts lines whose batch ran out of retries and kept
+    their source text.
+
+    sources: list of (path, loader) where loader() returns (srt.Cue list, digest or None).
+    backend: backends.TranslatorBackend shared by every request;
+             a pooled GoogleBackend is created for the run if not given.
+    journal: optional journal.JobJournal; every finished batch is appended
+             and cues it already covers are not sent again.
+    metrics: optional metrics.Metrics that receives request latency, batch
+             sizes, retries, failures, cache hits, throughput and queue depths.
+    tracer:  optional tracing.Tracer; records parse, schedule, batch and
+             request spans and retry markers.
+    merge_gap: merge a sentence split over consecutive cues (at most this
+             many ms apart) into one segment; None sends every cue alone.
+    detect_language: identify languages offline (langid.py): "auto" is
+             pinned per file, and lines already in a target language are
+             kept as they are instead of being sent.
+    classifier: passthrough.CueClassifier deciding which cues are copied or
+             mapped locally (symbols, numbers, optionally sound tags);
+             the default skips symbol- and number-only cues.
+    """
+    report = report or _noop
+    classifier = classifier or DEFAULT_CLASSIFIER
+    metrics = metrics or NULL_METRICS
+    tracer = tracer or NULL_TRACER
+    m_latency = metrics.histogram("translator_request_seconds", "Backend request latency by outcome", LATENCY_BUCKETS)
+    m_batch_lines = metrics.histogram("translator_batch_lines", "Lines per request sent", LINES_BUCKETS)
+    m_batch_chars = metrics.histogram("translator_batch_chars", "Characters per request sent, before delimiters",
+                                      CHARS_BUCKETS)
+    m_retries = metrics.counter("translator_retries_total", "Requests retried, by error type")
+    m_bisections = metrics.counter("translator_bisections_total", "Batches split in half after a split mismatch")
+    m_partial = metrics.counter("translator_partial_failures_total", "Lines left untranslated after bisection")
+    m_batch_errors = metrics.counter("translator_batch_errors_total", "Batches that failed after every retry")
+    m_cache = metrics.counter("translator_cache_lookups_total", "Translation memory lookups by result")
+    m_skipped = metrics.counter("translator_cues_skipped_total", "Cues kept without a request, by reason")
+    m_lines = metrics.counter("translator_lines_total", "Cue lines finished, by target language")
+    m_files = metrics.counter("translator_files_total", "Files finished, by target language")
+    m_file_rate = metrics.histogram("translator_file_lines_per_second", "Lines per second of each finished file",
+                                    RATE_BUCKETS)
+    m_events = metrics.gauge("translator_events_queue_depth", "Results waiting for the scheduler")
+    m_outstanding = metrics.gauge("translator_outstanding_batches", "Batches submitted and not yet handled")
+    m_inflight = metrics.gauge("translator_inflight_requests", "Requests currently holding a limiter slot")
+    m_limit = metrics.gauge("translator_concurrency_limit", "Current adaptive in-flight limit")
+    m_open_files = metrics.gauge("translator_open_files", "Files parsed and not yet finished")
+    dst_codes = list(dict.fromkeys(dst_codes))
+    measure = utf8_len if count_bytes else len
+    total_files = len(sources)
+    total_items = total_files * len(dst_codes)
+    own_backend = backend is None
+    if own_backend:
+        backend = make_backend(src_code, dst_codes[0], pool_size=limiter.max_limit)
+    # Budget counts delimiters, so staying under the backend's hard limit is enough
+    limits = backend.limits()
+    hard_limit = limits["max_chars"] - 1
+    overhead = limits.get("overhead", DELIMITER_OVERHEAD)
+    budgets = {}
+    for code in dst_codes:
+        default_chars, default_lines, _ = batch_settings(code)
+        budgets[code] = (min(max_chars or default_chars, hard_limit), batch_size or default_lines)
+
+    events = queue.Queue()
+    slots = threading.Semaphore(max(1, max_open_files))
+    counters_lock = threading.Lock()
+
+    def parse_all():
+        for no, (path, load) in enumerate(sources):
+            with tracer.span("wait_for_slot", "parse"):
+                slots.acquire()
+            try:
+                with tracer.span("parse", "parse", file=os.path.basename(path or "")):
+                    subs, digest = load()
+                    job = FileJob(no, path, subs, dst_codes, digest, merge_gap, src_code, detect_language,
+                                  classifier)
+            except Exception as e:
+                slots.release()
+                events.put(("file_error", (path, e)))
+                continue
+            events.put(("parsed", job))
+        events.put(("parsed_all", None))
+
+    def count(job, code, key):
+        with counters_lock:
+            job.stats[code][key] += 1
+
+    run_started = time.monotonic()
+    requests_done = [0]     # HTTP requests answered or failed, for requests/s
+
+    def request(job, code, send):
+        """Translated parts, or None when the response didn't split cleanly."""
+        def attempt():
+            with limiter.slot():
+                started = time.monotonic()
+                outcome = "error"
+                try:
+                    with tracer.span("request", "backend", target=code, lines=len(send)):
+                        parts = backend.translate_batch(send, code, job.src)
+                    outcome = "ok"
+                    return parts
+                except SplitMismatch:
+                    # Not congestion: don't let it shrink the concurrency limit
+                    outcome = "split_mismatch"
+                    return None
+                except PERMANENT_ERRORS as e:
+                    # A bad request, not congestion either: leave the slot as ok, fail outside it
+                    outcome = "permanent_error"
+                    error = e
+                finally:
+                    m_latency.observe(time.monotonic() - started, outcome=outcome)
+                    with counters_lock:
+                        requests_done[0] += 1
+            raise error
+
+        def on_retry(n, e):
+            count(job, code, "retries")
+            m_retries.inc(error=type(e).__name__)
+            tracer.instant("retry", "backend", attempt=n + 1, error=type(e).__name__)
+
+        m_batch_lines.observe(len(send))
+        m_batch_chars.observe(sum(len(t) for t in send))
+        return retry_call(attempt, is_transient, retries=retries, on_retry=on_retry)
+
+    def translate_texts(job, code, send):
+        """Translations for send, bisecting on split mismatch; None for a line that never splits."""
+        parts = request(job, code, send)
+        if parts is not None:
+            return parts
+        if len(send) == 1:
+            m_partial.inc()
+            return [None]
+        count(job, code, "bisections")
+        m_bisections.inc()
+        tracer.instant("bisect", "backend", lines=len(send))
+        mid = len(send) // 2
+        return translate_texts(job, code, send[:mid]) + translate_texts(job, code, send[mid:])
+
+    def batch_job(job, code, texts, submitted=None):
+        """Return [(text, translation or None)]; None keeps each cue's original text."""
+        queued_ms = round((time.perf_counter() - submitted) * 1000, 1) if submitted else None
+        with tracer.span("batch", "batch", file=os.path.basename(job.path or ""), target=code,
+                         lines=len(texts), queued_ms=queued_ms):
+            return _batch_job(job, code, texts)
+
+    def _batch_job(job, code, texts):
+        cached = memory.get_many(job.src, code, texts) if memory else {}
+        results = [(t, cached[t]) for t in texts if t in cached]
+        send = [t for t in texts if t not in cached]
+        if memory:
+            m_cache.inc(len(results), result="hit")
+            m_cache.inc(len(send), result="miss")
+        if not send:
+            return results
+        try:
+            parts = translate_texts(job, code, send)
+        except Exception as e:
+            m_batch_errors.inc()
+            report("error", f"Batch error: {str(e)[:50]}")
+            return results + [(t, None) for t in send]
+        if memory:
+            memory.put_many(job.src, code, [(t, p) for t, p in zip(send, parts) if p])
+        return results + [(t, p if p is None else p or t) for t, p in zip(send, parts)]
+
+    checkpoint = {}     # (job, code) -> ([cue indices], [translations]) to journal
+
+    def fill(job, code, text, txt):
+        job.fill(code, text, txt)
+        if journal and job.digest and txt is not None:
+            cues, trs = checkpoint.setdefault((job, code), ([], []))
+            cues.append(job.groups[text])
+            trs.append(txt)
+
+    def write_checkpoint():
+        for (job, code), (cues, trs) in checkpoint.items():
+            journal.record(job.digest, src_code, code, cues, trs)
+        checkpoint.clear()
+
+    # Keyed by source language too: with detect_language every file has its own
+    seen = OrderedDict()    # (src, code, text) -> translation, the run's SEEN_MAX_LINES most recent
+    waiters = {}            # (src, code, text) in flight -> [FileJob, ...] that need it
+    active = {}
+    run_stats = {}
+    outstanding = 0
+    parsing = True
+    items_done = 0
+
+    lines_finished = 0      # lines of every (file, language) already yielded
+
+    def remember(key, txt):
+        seen[key] = txt
+        seen.move_to_end(key)
+        if len(seen) > SEEN_MAX_LINES:
+            seen.popitem(last=False)
+
+    def finish(job, code):
+        nonlocal items_done, lines_finished
+        lines_finished += job.total
+        job.pending.discard(code)
+        if not job.pending:
+            del active[job.no]
+            slots.release()
+        items_done += 1
+        m_lines.inc(job.total, target=code)
+        m_files.inc(target=code)
+        if job.total:
+            m_file_rate.observe(job.total / max(time.monotonic() - job.started, 1e-6))
+        st = job.stats[code]
+        for key, n in st.items():
+            run_stats[key] = run_stats.get(key, 0) + n
+        resumed = f", {st['resumed']} resumed" if st["resumed"] else ""
+        merged = f", {st['merged']} cues merged into sentences" if st["merged"] else ""
+        in_target = f", {st['in_target']} already in {code}" if st["in_target"] else ""
+        failed = f", {st['failed']} FAILED" if st["failed"] else ""
+        kept = ", ".join(f"{rule} {st[rule]}" for rule in RULES if st[rule])
+        kept = f", kept without a request: {kept}" if kept else ""
+        source = f"{job.src} " if src_code == "auto" and job.src != "auto" else ""
+        report("log", f"[{items_done}/{total_items}] {os.path.basename(job.path or '')} {source}→ {code} "
+                      f"({len(job.subs)} cues, {st['unique']}/{st['deduped']} lines sent after dedup, "
+                      f"{st['retries']} retries, {st['bisections']} bisections{resumed}{merged}{in_target}{kept}{failed})\n")
+        return job.path, code, job.result(code), st["failed"]
+
+    def report_progress(job, code):
+        partial = sum(j.done[c] / j.total for j in active.values() if j.total for c in j.pending)
+        report("progress", (items_done + partial) / max(total_items, 1))
+        if job.total:
+            st = job.stats[code]
+            now = time.monotonic()
+            elapsed = max(now - run_started, 1e-6)
+            lines_done = lines_finished + sum(j.done[c] for j in active.values() for c in j.pending)
+            file_rate = job.done[code] / max(now - job.started, 1e-6)
+            report("status", f"File {job.no+1}/{total_files} [{code}] — {job.done[code]}/{job.total} lines "
+                             f"({st['unique']} unique, dedup {_saved(st):.0%}) — "
+                             f"{file_rate:.0f} lines/s file, {lines_done / elapsed:.0f} lines/s overall, "
+                             f"{requests_done[0] / elapsed:.1f} req/s — {int(limiter.limit)} in flight max")
+
+    Thread(target=parse_all, daemon=True).start()
+    # Pool sized to the ceiling; the limiter decides how many actually run
+    with ThreadPoolExecutor(max_workers=limiter.max_limit) as pool:
+        while parsing or outstanding:
+            kind, payload = events.get()
+            m_events.set(events.qsize())
+            m_outstanding.set(outstanding)
+            m_inflight.set(limiter.inflight)
+            m_limit.set(int(limiter.limit))
+            m_open_files.set(len(active))
+            if kind == "parsed":
+                job = payload
+                with tracer.span("schedule", "scheduler", file=os.path.basename(job.path or "")):
+                    active[job.no] = job
+                    packed = {}
+                    ready = []
+                    for code in dst_codes:
+                        prior = journal.lookup(job.digest, src_code, code) if journal and job.digest else {}
+                        # Identical lines are translated once and fanned back out to every
+                        # cue; lines already translated or in flight for another file
+                        # are not sent again. Texts that clean down to "" keep the original.
+                        new = []
+                        for t in job.groups:
+                            key = (job.src, code, t)
+                            if not t:
+                                job.fill(code, t, None)
+                            elif t in job.rule:
+                                # Symbols, numbers, sound tags: copy, or map through the tag table
+                                rule = job.rule[t]
+                                job.fill(code, t, classifier.output(t, rule, code))
+                                job.stats[code][rule] += job.weight[t]
+                                m_skipped.inc(job.weight[t], reason=rule)
+                            elif same_language(job.lang.get(t), code):
+                                # Already in the target language: keep the cue as it is
+                                job.fill(code, t, None)
+                                job.stats[code]["in_target"] += job.weight[t]
+                                m_skipped.inc(job.weight[t], reason="in_target")
+                            elif prior and all(i in prior for i in job.groups[t]):
+                                # Finished before a crash/restart: take it from the journal
+                                job.fill(code, t, prior[job.groups[t][0]])
+                                job.stats[code]["resumed"] += job.weight[t]
+                                remember(key, prior[job.groups[t][0]])
+                            elif key in seen:
+                                job.stats[code]["deduped"] += len(job.groups[t])
+                                seen.move_to_end(key)
+                                fill(job, code, t, seen[key])
+                            elif key in waiters:
+                                job.stats[code]["deduped"] += len(job.groups[t])
+                                waiters[key].append(job)
+                                job.waiting[code] += 1
+                            else:
+                                job.stats[code]["deduped"] += len(job.groups[t])
+                                waiters[key] = [job]
+                                job.waiting[code] += 1
+                                new.append(t)
+                        job.stats[code]["unique"] = len(new)
+                        # Languages usually need the same texts: pack once, reuse
+                        pack_key = (tuple(new), budgets[code])
+                        if pack_key not in packed:
+                            packed[pack_key] = pack_batches(new, *budgets[code], overhead, measure)
+                        for batch in packed[pack_key]:
+                            job.stats[code]["requests"] += 1
+                            outstanding += 1
+                            fut = pool.submit(batch_job, job, code, batch, time.perf_counter())
+                            fut.add_done_callback(lambda f, s=job.src, c=code, b=batch:
+                                                  events.put(("batch", (s, c, b, f))))
+                        if not job.waiting[code]:
+                            ready.append(code)
+                    if journal:
+                        write_checkpoint()
+                for code in ready:
+                    yield finish(job, code)
+            elif kind == "batch":
+                outstanding -= 1
+                src, code, batch, fut = payload
+                try:
+                    results = fut.result()
+                except Exception as e:
+                    report("error", f"Error: {e}")
+                    results = [(t, None) for t in batch]
+                touched = {}
+                for text, txt in results:
+                    key = (src, code, text)
+                    if txt is not None:
+                        remember(key, txt)
+                    for j in waiters.pop(key, []):
+                        fill(j, code, text, txt)
+                        if txt is None:
+                            # Out of retries: the cue keeps its source text, count it
+                            j.stats[code]["failed"] += j.weight[text]
+                        j.waiting[code] -= 1
+                        touched[j.no] = j
+                if journal:
+                    write_checkpoint()
+                for no in sorted(touched):
+                    report_progress(touched[no], code)
+                    if not touched[no].waiting[code]:
+                        yield finish(touched[no], code)
+            elif kind == "file_error":
+                report("file_error", payload)
+            elif kind == "parsed_all":
+                parsing = False
+    if own_backend:
+        backend.close()
+
+    if run_stats.get("lines"):
+        resumed = f", {run_stats['resumed']} lines resumed from the journal" if run_stats["resumed"] else ""
+        in_target = (f", {run_stats['in_target']} lines already in the target language"
+                     if run_stats["in_target"] else "")
+        kept = ", ".join(f"{rule} {run_stats[rule]}" for rule in RULES if run_stats[rule])
+        kept = f", kept without a request: {kept}" if kept else ""
+        failed = f", {run_stats['failed']} lines FAILED (source text kept)" if run_stats["failed"] else ""
+        report("log", f"Dedup: {run_stats['unique']}/{run_stats['deduped']} unique lines "
+                      f"({_saved(run_stats):.0%} saved), "
+                      f"{run_stats['requests']} requests, {run_stats['retries']} retries, "
+                      f"{run_stats['bisections']} bisections{resumed}{in_target}{kept}{failed}\n")
+
+def _saved(stats):
+    """Share of the lines that went through dedup that didn't need a request of their own."""
+    return 1 - stats["unique"] / stats["deduped"] if stats["deduped"] else 0.0
+
+def translate_subs(subs, src_code, dst_code, batch_size=None, max_workers=None, report=None,
+                   memory=None, max_chars=None, count_bytes=False, limiter=None, retries=DEFAULT_RETRIES,
+                   backend=None, metrics=None, tracer=None, merge_gap=None, detect_language=False,
+                   classifier=None):
+    """
+    Translate already-parsed cues (srt.Cue, or anything with index/start/end/text
+    such as pysrt items); returns a new srt.Cue list.
+
+    batch_size:  line cap per request; max_chars: character budget per request
+                 (bytes with count_bytes=True), delimiters included.
+    max_workers: ceiling for in-flight requests; limiter: shared AdaptiveLimiter
+                 that moves the actual limit between 1 and that ceiling.
+    memory:      optional cache.TranslationMemory checked before every request.
+    retries:     attempts per request after the first on transient errors
+                 (jittered exponential backoff). A split mismatch re-sends the
+                 batch in halves until the offending line is isolated.
+    backend:     translator shared by every request (default: pooled GoogleBackend).
+    metrics:     optional metrics.Metrics to record the run into.
+    tracer:      optional tracing.Tracer collecting spans for a trace viewer.
+    merge_gap:   join sentences split over cues at most this many ms apart into
+                 one segment and split the translation back (None: off;
+                 DEFAULT_MERGE_GAP_MS is a sensible value).
+    detect_language: offline language ID - pin "auto" to the detected source
+                 and keep lines already in the target language untouched.
+    classifier:  passthrough.CueClassifier for cues that never need a request
+                 (default: symbol- and number-only cues are copied).
+    """
+    limiter = limiter or _make_limiter(dst_code, max_workers)
+    for _, _, translated, _ in _run_pipeline([(None, lambda: (subs, None))], src_code, [dst_code], batch_size, max_chars,
+                                          count_bytes, limiter, retries, memory, report, backend=backend,
+                                          metrics=metrics, tracer=tracer, merge_gap=merge_gap,
+                                          detect_language=detect_language, classifier=classifier):
+        return translated
+    return []
+
+def translate_files_multi(paths, src_code, dst_codes, batch_size=None, max_workers=None, report=None,
+                          memory=None, max_chars=None, count_bytes=False, limiter=None,
+                          retries=DEFAULT_RETRIES, max_open_files=DEFAULT_OPEN_FILES, backend=None,
+                          journal=None, metrics=None, tracer=None, merge_gap=None, detect_language=False,
+                          classifier=None):
+    """
+    Yield (path, dst_code, translated_subs, failed) for every file that could
+    be opened and every target language, in the order they finish; failed
+    is the number of lines left untranslated (source text kept). Options as
+    for translate_subs; max_open_files bounds how many files are parsed
+    ahead of the translator; journal (journal.JobJournal) makes the run
+    resumable. One AdaptiveLimiter is shared by the whole run unless one
+    is passed in.
+    """
+    report = report or _noop
+    limiter = limiter or _make_limiter(dst_codes, max_workers)
+    sources = [(path, lambda p=path: _load_srt(p)) for path in paths]
+    yield from _run_pipeline(sources, src_code, dst_codes, batch_size, max_chars, count_bytes,
+                             limiter, retries, memory, report, max_open_files, backend, journal, metrics,
+                             tracer, merge_gap, detect_language, classifier)
+    snap = limiter.snapshot()
+    report("log", f"Concurrency: limit {snap['limit']} (max {snap['max_limit']}), "
+                  f"{snap['increases']} increases, {snap['decreases']} decreases\n")
+    if memory:
+        st = memory.stats()
+        report("log", f"Translation memory: {st['hits']} hits, {st['misses']} misses ({st['hit_rate']:.0%})\n")
+
+def translate_files(paths, src_code, dst_code, batch_size=None, max_workers=None, report=None, **options):
+    """Single-target translate_files_multi: yields (path, translated_subs)."""
+    for path, _, subs, _ in translate_files_multi(paths, src_code, [dst_code], batch_size, max_workers,
+                                               report, **options):
+        yield path, subs
+
+def translated_path(orig_path, dst_code, folder=None):
+    """name.srt -> <folder>/name.<code>.srt (zh-CN -> zhcn)"""
+    folder = folder or os.path.dirname(orig_path)
+    code = dst_code.replace("-", "").lower()
+    name, ext = os.path.splitext(os.path.basename(orig_path))
+    return os.path.join(folder, f"{name}.{code}{ext}")
+
+def save_translated(orig_path, subs, dst_code, folder=None):
+    """Atomic: written to a temp file in the target folder, then renamed over the final name."""
+    save_path = translated_path(orig_path, dst_code, folder)
+    # Same folder so the rename is atomic; unique per thread so concurrent saves don't collide
+    tmp_path = os.path.join(os.path.dirname(save_path),
+                            f".{os.path.basename(save_path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        srt.save(subs, tmp_path)
+        os.replace(tmp_path, save_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return save_path
+
+def stream_translate(paths, src_code, dst_codes, folder=None, report=None, **options):
+    """
+    Streaming output mode: each (file, language) is saved atomically the
+    moment its last batch lands and then dropped, so memory depends on the
+    files in flight rather than the whole selection. Yields
+    (orig_path, dst_code, save_path, error, failed) - error is None once
+    saved; failed counts lines left untranslated, and a file with any is
+    saved but not complete. Options as for translate_files_multi.
+    """
+    report = report or _noop
+    tracer = options.get("tracer") or NULL_TRACER
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    for path, code, subs, failed in translate_files_multi(paths, src_code, dst_codes, report=report, **options):
+        try:
+            with tracer.span("save", "save", file=os.path.basename(path), target=code):
+                save_path = save_translated(path, subs, code, folder)
+        except Exception as e:
+            report("error", f"Save failed: {os.path.basename(path)} ({code}): {e}")
+            yield path, code, translated_path(path, code, folder), e, failed
+            continue
+        del subs
+        yield path, code, save_path, None, failed
+
+# -------------------------------------------------
+# UTF-8 Conversion
+# -------------------------------------------------
+def detect_encoding(file_path):
+    with open(file_path, "rb") as f:
+        return detect_bytes(f.read())[0]
+
+def convert_to_utf8(file_path):
+    """Rewrite the file as UTF-8 (no BOM, \n line endings); returns the source encoding."""
+    with open(file_path, "rb") as f:
+        data = f.read()
+    encoding, _ = detect_bytes(data)
+    if encoding == "utf-8" and b"\r" not in data:
+        return encoding     # already what we'd write
+    content = data.decode(encoding, errors="replace").replace("\r\n", "\n").replace("\r", "\n")
+    with open(file_path, "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+    return encoding
+
+def _convert_job(file_path):
+    # Runs in a worker process: return the error as text, exceptions may not pickle
+    try:
+        return convert_to_utf8(file_path), None
+    except Exception as e:
+        return None, str(e)
+
+def convert_files(paths, report=None, workers=None):
+    """
+    Convert files in place; reports ("log", text), ("progress", (frac, i, total)), ("done", None).
+    Detection is CPU-bound, so large selections are spread over worker
+    processes (workers, default one per core) and logged as they finish.
+    """
+    report = report or _noop
+    total = len(paths)
+    success = 0
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    futures = {}
+    if workers > 1 and total >= PARALLEL_CONVERT_MIN_FILES:
+        try:
+            pool = ProcessPoolExecutor(max_workers=min(workers, total))
+        except (OSError, NotImplementedError, ImportError):
+            pool = None     # no multiprocessing here (restricted sandbox, some frozen builds)
+    try:
+        if pool:
+            futures = {pool.submit(_convert_job, p): p for p in paths}
+            results = ((futures[f], f.result()) for f in as_completed(futures))
+        else:
+            results = ((p, _convert_job(p)) for p in paths)
+        for i, (file_path, (encoding, error)) in enumerate(results):
+            report("log", f"[{i+1}/{total}] {os.path.basename(file_path)}\n")
+            if error is None:
+                success += 1
+                report("log", f"   Success ({encoding})\n\n")
+            else:
+                report("log", f"   Failed: {error}\n\n")
+            report("progress", ((i+1)/total, i+1, total))
+    finally:
+        if pool:
+            # Stopped early (e.g. Ctrl+C): don't start files still queued
+            for f in futures:
+                f.cancel()
+            pool.shutdown()
+
+    report("log", f"Complete! {success}/{total} succeeded.\n")
+    report("done", None)
+    return success
+
+# -------------------------------------------------
+# FFmpeg Helpers (No Console Window)
+# -------------------------------------------------
+def run_ffprobe(file_path):
+    cmd = [FFPROBE_PATH, "-v", "error", "-select_streams", "s",
+           "-show_entries", "stream=index:stream_tags=language,title", "-of", "json", file_path]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False, creationflags=CREATE_NO_WINDOW)
+        return json.loads(result.stdout) if result.returncode == 0 else None
+    except Exception:
+        return None
+
+def is_english_stream(stream):
+    tags = stream.get("tags", {}) or {}
+    lang = (tags.get("language") or "").lower()
+    title = (tags.get("title") or "").lower()
+    return lang in {"en", "eng", "en-gb", "en-us"} or "english" in title or "eng" in title
+
+def find_english_subtitle_streams(file_path):
+    data = run_ffprobe(file_path)
+    if not data: return []
+    return [s for s in data.get("streams", []) if is_english_stream(s)]
+
+def extract_subtitle_stream(file_path, stream_index, out_path):
+    cmd = [FFMPEG_PATH, "-y", "-i", file_path, "-map", f"0:{stream_index}", "-c:s", "srt", out_path]
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, check=False, creationflags=CREATE_NO_WINDOW)
+        return result.returncode == 0, result.stderr
+    except Exception:
+        return False, "ffmpeg error"
+
+def extract_files(paths, output_dir, report=None):
+    """Extract every English subtitle track; same report protocol as convert_files."""
+    report = report or _noop
+    total = len(paths)
+    extracted = 0
+    for i, path in enumerate(paths):
+        name = os.path.basename(path)
+        report("log", f"[{i+1}/{total}] {name}\n")
+        streams = find_english_subtitle_streams(path)
+        if not streams:
+            report("log", "   No English subtitles found.\n\n")
+        else:
+            report("log", f"   Found {len(streams)} English track(s)\n")
+            for s in streams:
+                idx = s["index"]
+                out_name = f"{os.path.splitext(name)[0]}_eng_{idx}.srt"
+                out_path = os.path.join(output_dir, out_name)
+                report("log", f"   Extracting → {out_name} ... ")
+                success, _ = extract_subtitle_stream(path, idx, out_path)
+                extracted += success
+                report("log", "Success!\n" if success else "Failed!\n")
+            report("log", "\n")
+        report("progress", ((i+1)/total, i+1, total))
+    report("log", "All extraction completed!\n")
+    report("done", None)
+    return extracted
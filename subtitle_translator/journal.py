@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Append-only checkpoint journal for resumable translation jobs.
+
+Every finished batch is appended as one JSON line:
+    {"f": <sha1 of file>, "s": <source>, "l": <target>, "c": [[cue, ...], ...], "t": [translation, ...]}
+A restarted job replays the journal and only sends the cues it doesn't cover.
+A torn last line (crash mid-write) is ignored.
+"""
+
+import os
+import json
+import hashlib
+
+from .cache import default_cache_path
+
+def file_digest(data):
+    return hashlib.sha1(data).hexdigest()
+
+def default_journal_path(paths, src_code, dst_codes):
+    """Per-selection journal in the user cache dir, so re-running the same job resumes it."""
+    key = "\n".join([src_code] + sorted(dst_codes) + sorted(os.path.abspath(p) for p in paths))
+    name = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(os.path.dirname(default_cache_path()), "jobs", f"{name}.jsonl")
+
+class JobJournal:
+    """Written from the pipeline's scheduler thread only; not thread-safe by design."""
+
+    def __init__(self, path, fsync=False):
+        self.path = path
+        self.fsync = fsync
+        self.done = {}          # (digest, src, dst) -> {cue index: translation}
+        self.replayed = 0
+        torn = False
+        if os.path.exists(path):
+            torn = self._load()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(path, "a", encoding="utf-8")
+        if torn:
+            # End the fragment so the next record starts on a line of its own
+            self._f.write("\n")
+            self._f.flush()
+
+    def _load(self):
+        """Replay the file; True if it ends in a torn (unterminated) line."""
+        line = ""
+        with open(self.path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                    cues = self.done.setdefault((rec["f"], rec["s"], rec["l"]), {})
+                    for idxs, tr in zip(rec["c"], rec["t"]):
+                        for i in idxs:
+                            cues[i] = tr
+                    self.replayed += 1
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return bool(line) and not line.endswith("\n")
+
+    def lookup(self, digest, src, dst):
+        """{cue index: translation} already journaled for this file and language pair."""
+        return self.done.get((digest, src, dst), {})
+
+    def record(self, digest, src, dst, cue_groups, translations):
+        if not cue_groups: return
+        line = json.dumps({"f": digest, "s": src, "l": dst, "c": cue_groups, "t": translations},
+                          ensure_ascii=False, separators=(",", ":"))
+        self._f.write(line + "\n")
+        # flush() hands the line to the OS, which survives an app crash;
+        # fsync=True also survives power loss at the cost of a disk sync per batch
+        self._f.flush()
+        if self.fsync:
+            os.fsync(self._f.fileno())
+
+    def close(self):
+        if not self._f.closed:
+            self._f.close()
+
+    def discard(self):
+        """Close and delete; call once a job has completed and been saved."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Offline language identification for subtitle text.
+
+Two steps, both local:
+
+1. Script: Sinhala, Thai, Greek, Arabic, Devanagari, Bengali, Hangul and
+   kana each point straight at one language; Han is Chinese (simplified or
+   traditional by a few telltale characters).
+2. Latin and Cyrillic text is scored against character trigram profiles
+   (naive Bayes, add-one smoothing) built at import from the short samples
+   below. That is plenty for a whole file and for a line of dialogue; very
+   short or ambiguous lines return None rather than a guess.
+
+detect_file() pins a file's source language once, so requests carry a real
+source code instead of "auto"; detect() runs per unique cue text so lines
+already in the target language can be kept as they are.
+"""
+
+import re
+import math
+from bisect import bisect_right
+from collections import Counter
+
+# Lines with fewer letters than this are never classified (okay, no, ja...)
+MIN_CUE_LETTERS = 12
+# Average log-probability lead per trigram of the best language over the runner-up
+MIN_CUE_MARGIN = 0.1
+MIN_FILE_MARGIN = 0.05
+# Text sampled for the per-file decision
+FILE_SAMPLE_CHARS = 20000
+
+_SAMPLES = {
+    "en": "what are you doing here i told you we should never have come this is not the way home "
+          "please listen to me i don't know where she is right now we have to go back and find them "
+          "thank you very much that's all i wanted to say they were there with the other children "
+          "come on let's get out of here before it's too late would you like something to drink",
+    "nl": "wat doe je hier ik zei toch dat we nooit hadden moeten komen dit is niet de weg naar huis "
+          "luister alsjeblieft naar mij ik weet niet waar ze nu is we moeten terug gaan en ze zoeken "
+          "dank je wel dat is alles wat ik wilde zeggen ze waren daar met de andere kinderen "
+          "kom op laten we hier weggaan voordat het te laat is wil je iets drinken het gaat goed met hem",
+    "fr": "qu'est-ce que tu fais ici je t'avais dit qu'on n'aurait jamais dû venir ce n'est pas le chemin "
+          "écoute-moi s'il te plaît je ne sais pas où elle est maintenant il faut qu'on retourne les chercher "
+          "merci beaucoup c'est tout ce que je voulais dire ils étaient là avec les autres enfants "
+          "allez viens on s'en va avant qu'il soit trop tard tu veux quelque chose à boire",
+    "de": "was machst du hier ich habe dir gesagt dass wir nie hätten kommen sollen das ist nicht der weg "
+          "hör mir bitte zu ich weiß nicht wo sie jetzt ist wir müssen zurück und sie finden "
+          "vielen dank das ist alles was ich sagen wollte sie waren dort mit den anderen kindern "
+          "komm schon lass uns hier verschwinden bevor es zu spät ist möchtest du etwas trinken",
+    "it": "che cosa ci fai qui te l'avevo detto che non saremmo mai dovuti venire questa non è la strada "
+          "ascoltami per favore non so dove sia adesso dobbiamo tornare indietro e trovarli "
+          "grazie mille è tutto quello che volevo dire erano lì con gli altri bambini "
+          "andiamo usciamo di qui prima che sia troppo tardi vuoi qualcosa da bere che cosa è successo",
+    "pt": "o que você está fazendo aqui eu te disse que nunca devíamos ter vindo este não é o caminho "
+          "por favor me escute eu não sei onde ela está agora nós temos que voltar e encontrá-los "
+          "muito obrigado é tudo o que eu queria dizer eles estavam lá com as outras crianças "
+          "vamos sair daqui antes que seja tarde demais você quer alguma coisa para beber não é isso",
+    "es": "qué estás haciendo aquí te dije que nunca debimos venir este no es el camino a casa "
+          "escúchame por favor no sé dónde está ella ahora tenemos que volver y encontrarlos "
+          "muchas gracias eso es todo lo que quería decir ellos estaban allí con los otros niños "
+          "vamos salgamos de aquí antes de que sea demasiado tarde quieres algo de beber qué pasa",
+    "ro": "ce faci aici ți-am spus că n-ar fi trebuit să venim niciodată acesta nu este drumul spre casă "
+          "ascultă-mă te rog nu știu unde este ea acum trebuie să ne întoarcem și să-i găsim "
+          "mulțumesc foarte mult asta e tot ce voiam să spun erau acolo cu ceilalți copii "
+          "haide să plecăm de aici înainte să fie prea târziu vrei ceva de băut ce s-a întâmplat",
+    "pl": "co ty tutaj robisz mówiłem ci że nigdy nie powinniśmy byli tu przychodzić to nie jest droga do domu "
+          "proszę posłuchaj mnie nie wiem gdzie ona teraz jest musimy wrócić i ich znaleźć "
+          "dziękuję bardzo to wszystko co chciałem powiedzieć byli tam z innymi dziećmi "
+          "chodź wynośmy się stąd zanim będzie za późno chcesz się czegoś napić co się stało",
+    "cs": "co tady děláš říkal jsem ti že jsme sem nikdy neměli chodit tohle není cesta domů "
+          "prosím poslouchej mě nevím kde teď je musíme se vrátit a najít je "
+          "moc děkuji to je všechno co jsem chtěl říct byli tam s ostatními dětmi "
+          "pojď vypadneme odsud než bude pozdě chceš něco k pití co se stalo to je v pořádku",
+    "hr": "što radiš ovdje rekao sam ti da nikad nismo trebali doći ovo nije put kući "
+          "molim te slušaj me ne znam gdje je ona sada moramo se vratiti i pronaći ih "
+          "hvala ti puno to je sve što sam htio reći bili su tamo s drugom djecom "
+          "hajde idemo odavde prije nego što bude prekasno želiš li nešto popiti što se dogodilo",
+    "hu": "mit csinálsz itt mondtam neked hogy soha nem kellett volna idejönnünk ez nem a hazafelé vezető út "
+          "kérlek figyelj rám nem tudom hol van most vissza kell mennünk és meg kell találnunk őket "
+          "nagyon köszönöm ez minden amit mondani akartam ott voltak a többi gyerekkel "
+          "gyere menjünk innen mielőtt túl késő lesz kérsz valamit inni mi történt minden rendben",
+    "sv": "vad gör du här jag sa ju att vi aldrig skulle ha kommit hit det här är inte vägen hem "
+          "snälla lyssna på mig jag vet inte var hon är nu vi måste gå tillbaka och hitta dem "
+          "tack så mycket det är allt jag ville säga de var där med de andra barnen "
+          "kom igen vi sticker härifrån innan det är för sent vill du ha något att dricka vad hände",
+    "da": "hvad laver du her jeg sagde jo at vi aldrig skulle være kommet det her er ikke vejen hjem "
+          "hør nu på mig jeg ved ikke hvor hun er nu vi bliver nødt til at gå tilbage og finde dem "
+          "mange tak det er alt hvad jeg ville sige de var der sammen med de andre børn "
+          "kom nu lad os komme væk herfra før det er for sent vil du have noget at drikke hvad skete der",
+    "no": "hva gjør du her jeg sa jo at vi aldri skulle ha kommet hit dette er ikke veien hjem "
+          "vær så snill og hør på meg jeg vet ikke hvor hun er nå vi må gå tilbake og finne dem "
+          "tusen takk det er alt jeg ville si de var der sammen med de andre barna "
+          "kom igjen la oss komme oss vekk herfra før det er for sent vil du ha noe å drikke hva skjedde",
+    "fi": "mitä sinä teet täällä sanoinhan että meidän ei olisi koskaan pitänyt tulla tämä ei ole tie kotiin "
+          "kuuntele minua ole kiltti en tiedä missä hän on nyt meidän täytyy palata ja löytää heidät "
+          "kiitos paljon siinä kaikki mitä halusin sanoa he olivat siellä muiden lasten kanssa "
+          "tule lähdetään täältä ennen kuin on liian myöhäistä haluatko jotain juotavaa mitä tapahtui",
+    "tr": "burada ne yapıyorsun sana buraya hiç gelmememiz gerektiğini söylemiştim bu eve giden yol değil "
+          "lütfen beni dinle onun şu an nerede olduğunu bilmiyorum geri dönüp onları bulmalıyız "
+          "çok teşekkür ederim söylemek istediğim bu kadar diğer çocuklarla birlikte oradaydılar "
+          "hadi çok geç olmadan buradan gidelim bir şey içmek ister misin ne oldu her şey yolunda mı",
+    "id": "apa yang kamu lakukan di sini aku sudah bilang kita seharusnya tidak pernah datang ini bukan jalan pulang "
+          "tolong dengarkan aku aku tidak tahu di mana dia sekarang kita harus kembali dan mencari mereka "
+          "terima kasih banyak hanya itu yang ingin aku katakan mereka ada di sana bersama anak-anak lain "
+          "ayo kita pergi dari sini sebelum terlambat kamu mau minum sesuatu apa yang terjadi",
+    "ms": "apa yang awak buat di sini saya dah cakap kita tak sepatutnya datang ini bukan jalan balik ke rumah "
+          "tolong dengar cakap saya saya tak tahu di mana dia sekarang kita kena balik dan cari mereka "
+          "terima kasih banyak itu sahaja yang saya nak cakap mereka ada di sana dengan budak-budak lain "
+          "jom kita keluar dari sini sebelum terlambat awak nak minum apa-apa apa yang berlaku",
+    "tl": "ano ang ginagawa mo dito sinabi ko na sa iyo na hindi tayo dapat pumunta rito hindi ito ang daan pauwi "
+          "pakinggan mo naman ako hindi ko alam kung nasaan siya ngayon kailangan nating bumalik at hanapin sila "
+          "maraming salamat iyon lang ang gusto kong sabihin nandoon sila kasama ang ibang mga bata "
+          "tara na umalis na tayo dito bago pa mahuli ang lahat gusto mo ba ng maiinom ano ang nangyari",
+    "vi": "bạn đang làm gì ở đây tôi đã nói với bạn là chúng ta không bao giờ nên đến đây đây không phải đường về nhà "
+          "làm ơn nghe tôi nói tôi không biết bây giờ cô ấy ở đâu chúng ta phải quay lại và tìm họ "
+          "cảm ơn bạn rất nhiều đó là tất cả những gì tôi muốn nói họ đã ở đó với những đứa trẻ khác "
+          "đi nào hãy ra khỏi đây trước khi quá muộn bạn có muốn uống gì không chuyện gì đã xảy ra",
+    "ru": "что ты здесь делаешь я же говорил тебе что нам не стоило сюда приходить это не дорога домой "
+          "пожалуйста послушай меня я не знаю где она сейчас нам нужно вернуться и найти их "
+          "большое спасибо это всё что я хотел сказать они были там с другими детьми "
+          "давай уйдём отсюда пока не стало слишком поздно хочешь что-нибудь выпить что случилось",
+    "uk": "що ти тут робиш я ж казав тобі що нам не варто було сюди приходити це не дорога додому "
+          "будь ласка послухай мене я не знаю де вона зараз нам треба повернутися і знайти їх "
+          "дуже дякую це все що я хотів сказати вони були там з іншими дітьми "
+          "ходімо звідси поки не стало занадто пізно хочеш щось випити що сталося з тобою все гаразд є",
+}
+
+# (first code point, script) for the scripts that matter here; anything else is "other"
+_RANGES = [
+    (0x0000, "other"), (0x0041, "latin"), (0x005B, "other"), (0x0061, "latin"), (0x007B, "other"),
+    (0x00C0, "latin"), (0x0250, "other"), (0x0370, "greek"), (0x0400, "cyrillic"), (0x0530, "other"),
+    (0x0600, "arabic"), (0x0780, "other"), (0x0900, "devanagari"), (0x0980, "bengali"), (0x0A00, "other"),
+    (0x0D80, "sinhala"), (0x0E00, "thai"), (0x0E80, "other"), (0x1100, "hangul"), (0x1200, "other"),
+    (0x1E00, "latin"), (0x1F00, "other"), (0x3040, "kana"), (0x3100, "other"), (0x3130, "hangul"),
+    (0x3190, "other"), (0x3400, "han"), (0x4DC0, "other"), (0x4E00, "han"), (0xA000, "other"),
+    (0xAC00, "hangul"), (0xD7B0, "other"), (0xF900, "han"), (0xFB00, "other"),
+]
+_STARTS = [start for start, _ in _RANGES]
+_SCRIPT_LANGUAGE = {"greek": "el", "arabic": "ar", "devanagari": "hi", "bengali": "bn", "sinhala": "si",
+                    "thai": "th", "hangul": "ko", "kana": "ja"}
+# Scripts where one character is about a syllable; each counts as three letters
+_SYLLABIC = {"han", "kana", "hangul", "thai"}
+_SCRIPT_CANDIDATES = {"latin": [c for c in _SAMPLES if c not in ("ru", "uk")], "cyrillic": ["ru", "uk"]}
+# Common characters that differ between simplified and traditional Chinese
+_SIMPLIFIED = set("这们说个来时会为国发对过还没实问与么应样开关经长现见请话让谢车东门马钱难边")
+_TRADITIONAL = set("這們說個來時會為國發對過還沒實問與麼應樣開關經長現見請話讓謝車東門馬錢難邊")
+
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+def _trigrams(text):
+    grams = []
+    for word in _WORD_RE.findall(text.lower()):
+        word = f" {word} "
+        grams.extend(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+def _build_profiles():
+    """
+    {code: {trigram: log-probability lead over an unseen trigram}} over the
+    shared vocabulary (0 where the language never saw it), and {code: unseen
+    log-probability}. Scoring is then one C-level map per language.
+    """
+    counts = {code: Counter(_trigrams(sample)) for code, sample in _SAMPLES.items()}
+    vocab = set().union(*counts.values())
+    profiles, unseen = {}, {}
+    for code, c in counts.items():
+        denominator = sum(c.values()) + len(vocab)
+        unseen[code] = math.log(1 / denominator)
+        profiles[code] = {g: math.log(c[g] + 1) for g in vocab}
+    return profiles, unseen, vocab
+
+_PROFILES, _UNSEEN, _VOCAB = _build_profiles()
+
+def script(text):
+    """Dominant script among the letters of text, or None if there are none."""
+    if text.isascii():
+        return "latin" if any(ch.isalpha() for ch in text) else None
+    counts = Counter()
+    for ch in text:
+        if ch.isalpha():
+            counts[_RANGES[bisect_right(_STARTS, ord(ch)) - 1][1]] += 1
+    counts.pop("other", None)
+    return counts.most_common(1)[0][0] if counts else None
+
+def _chinese(text):
+    simplified = sum(ch in _SIMPLIFIED for ch in text)
+    traditional = sum(ch in _TRADITIONAL for ch in text)
+    if simplified > traditional:
+        return "zh-CN"
+    if traditional > simplified:
+        return "zh-TW"
+    return "zh"
+
+def _score(text, candidates, min_margin):
+    grams = _trigrams(text)
+    if not grams:
+        return None
+    known = [g for g in grams if g in _VOCAB]
+    scores = sorted(((len(grams) * _UNSEEN[code] + sum(map(_PROFILES[code].__getitem__, known)), code)
+                     for code in candidates), reverse=True)
+    if len(scores) > 1 and (scores[0][0] - scores[1][0]) / len(grams) < min_margin:
+        return None
+    return scores[0][1]
+
+def detect(text, min_letters=MIN_CUE_LETTERS, min_margin=MIN_CUE_MARGIN):
+    """Language code of text ("zh" for Chinese that could be either script), or None if unsure."""
+    kind = script(text)
+    letters = sum(ch.isalpha() for ch in text)
+    if kind in _SYLLABIC:
+        letters *= 3
+    if letters < min_letters:
+        return None
+    if kind == "han":
+        # Kanji with any kana is Japanese
+        return "ja" if any(0x3040 <= ord(ch) < 0x3100 for ch in text) else _chinese(text)
+    if kind in _SCRIPT_LANGUAGE:
+        return _SCRIPT_LANGUAGE[kind]
+    if kind in _SCRIPT_CANDIDATES:
+        return _score(text, _SCRIPT_CANDIDATES[kind], min_margin)
+    return None
+
+def detect_file(texts, sample_chars=FILE_SAMPLE_CHARS):
+    """One language code for a whole file from a sample of its texts, or None if unsure."""
+    sample = []
+    size = 0
+    for t in texts:
+        if t:
+            sample.append(t)
+            size += len(t)
+            if size >= sample_chars:
+                break
+    return detect(" ".join(sample), min_letters=1, min_margin=MIN_FILE_MARGIN)
+
+# For plausibility(): any non-ASCII character is part of a word, so a code page
+# that turns "é" into "©" gets unseen trigrams instead of a clean word break
+_LOOSE_WORD_RE = re.compile(r"(?:[^\W\d_]|[^\x00-\x7f])+")
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f\s]")
+# Every character some language sample uses, plus accents the samples happen to miss
+_ALPHABET = set("".join(_SAMPLES.values())) | set("çïëÿœæøåñüöäâêîôûàèìòùáéíóúãõ")
+
+def plausibility(text):
+    """
+    (share of non-ASCII characters found in the language samples, mean
+    trigram log-probability of the non-ASCII words under the best-fitting
+    profile), or None without such words. Higher reads more like a real language; encoding.py
+    uses it to choose between code pages the detector can't tell apart.
+    """
+    text = text.lower()
+    grams = []
+    for word in _LOOSE_WORD_RE.findall(text):
+        # Plain ASCII words read the same in every code page
+        if not word.isascii():
+            word = f" {word} "
+            grams.extend(word[i:i + 3] for i in range(len(word) - 2))
+    if not grams:
+        return None
+    foreign = _NON_ASCII_RE.findall(text)
+    known = sum(ch in _ALPHABET for ch in foreign) / len(foreign)
+    seen = [g for g in grams if g in _VOCAB]
+    return known, max(len(grams) * _UNSEEN[code] + sum(map(_PROFILES[code].__getitem__, seen))
+                      for code in _PROFILES) / len(grams)
+
+def same_language(detected, code):
+    """detected (from detect) is code; "zh" matches both zh-CN and zh-TW."""
+    return detected is not None and (detected == code or code.split("-")[0] == detected)
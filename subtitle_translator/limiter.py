@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Adaptive concurrency limit (AIMD) for translator requests.
+Grows the number of in-flight requests by one per healthy window and
+halves it on errors, timeouts or latency well above the observed floor.
+"""
+
+import time
+import threading
+
+class AdaptiveLimiter:
+    """
+    Use as a context manager around each request:
+
+        with limiter.slot() as s:
+            call()
+            s.ok()          # or leave it; an exception marks the slot failed
+    """
+
+    def __init__(self, initial=5, min_limit=1, max_limit=16, backoff=0.5,
+                 latency_tolerance=2.5, cooldown=1.0):
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limit = float(min(max(initial, min_limit), self.max_limit))
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.inflight = 0
+        self.min_latency = None
+        self.increases = 0
+        self.decreases = 0
+        self.history = [(time.time(), int(self.limit), "start")]
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self.inflight >= int(self.limit):
+                self._cond.wait()
+            self.inflight += 1
+
+    def release(self, latency=None, ok=True):
+        with self._cond:
+            self.inflight -= 1
+            if ok and latency is not None:
+                # Decaying floor so a one-off fast response doesn't pin it forever
+                if self.min_latency is None or latency < self.min_latency:
+                    self.min_latency = latency
+                else:
+                    self.min_latency += (latency - self.min_latency) * 0.01
+            slow = ok and latency is not None and latency > self.min_latency * self.latency_tolerance
+            if not ok or slow:
+                self._decrease("error" if not ok else "latency")
+            else:
+                self._increase()
+            self._cond.notify_all()
+
+    def _increase(self):
+        # Additive increase: +1 per "limit" successful requests
+        before = int(self.limit)
+        self.limit = min(self.max_limit, self.limit + 1.0 / max(self.limit, 1.0))
+        if int(self.limit) != before:
+            self.increases += 1
+            self.history.append((time.time(), int(self.limit), "increase"))
+
+    def _decrease(self, reason):
+        now = time.time()
+        # One decrease per cooldown: a burst of failures from the same
+        # congestion event shouldn't collapse the limit to the minimum
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        before = int(self.limit)
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        if int(self.limit) != before:
+            self.decreases += 1
+            self.history.append((now, int(self.limit), reason))
+
+    def slot(self):
+        return _Slot(self)
+
+    def snapshot(self):
+        with self._cond:
+            return {"limit": int(self.limit), "inflight": self.inflight,
+                    "min_limit": self.min_limit, "max_limit": self.max_limit,
+                    "increases": self.increases, "decreases": self.decreases,
+                    "min_latency": self.min_latency,
+                    "history": [{"time": t, "limit": l, "reason": r} for t, l, r in self.history]}
+
+class _Slot:
+    def __init__(self, limiter):
+        self.limiter = limiter
+        self._ok = None
+
+    def ok(self):
+        self._ok = True
+
+    def fail(self):
+        self._ok = False
+
+    def __enter__(self):
+        self.limiter.acquire()
+        self._start = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ok = exc_type is None and self._ok is not False
+        self.limiter.release(time.monotonic() - self._start, ok)
+        return False
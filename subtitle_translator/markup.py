@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""
+Cue text normalization that keeps subtitle markup.
+
+protect() makes one pass over a cue: tags before the first word and after
+the last one (<i>…</i> around a whole line, {\\an8} positioning) are kept
+aside and never sent; tags inside the text become compact {0}, {1}…
+placeholders the translator leaves alone; whitespace is collapsed.
+restore() puts everything back around the translation.
+
+    "{\\an8}<i>I <b>really</b> mean it</i>"
+    -> "I {0}really{1} mean it" + Markup(prefix="{\\an8}<i>", tags=["<b>", "</b>"], suffix="</i>")
+"""
+
+import re
+
+# {\an8}, {\i1}… (ASS overrides) and <i>, </font>, <font color=…> (HTML-ish SRT tags)
+_TAG_RE = re.compile(r"\{[^}]*\}|<[^>]*>")
+# Translators sometimes pad placeholders: "{ 0 }"
+_PLACEHOLDER_RE = re.compile(r"\{\s*(\d+)\s*\}")
+
+class Markup:
+    __slots__ = ("prefix", "suffix", "tags")
+
+    def __init__(self, prefix="", suffix="", tags=()):
+        self.prefix = prefix
+        self.suffix = suffix
+        self.tags = tags
+
+def clean_text(text):
+    """Text with all markup removed and whitespace collapsed (dedup/cache key for plain cues)."""
+    if "<" in text or "{" in text:
+        text = _TAG_RE.sub("", text)
+    return " ".join(text.split())
+
+def protect(text):
+    """(normalized text with placeholders, Markup or None)."""
+    if "<" not in text and "{" not in text:
+        return " ".join(text.split()), None
+    parts = []
+    tags = []
+    pos = 0
+    for m in _TAG_RE.finditer(text):
+        parts.append(text[pos:m.start()])
+        parts.append(m.group())
+        pos = m.end()
+    parts.append(text[pos:])
+    # parts alternates text, tag, text, tag, …, text
+    first = next((i for i in range(0, len(parts), 2) if parts[i].strip()), None)
+    if first is None:
+        return "", None
+    last = next(i for i in range(len(parts) - 1, -1, -2) if parts[i].strip())
+    prefix = "".join(parts[1:first:2])
+    suffix = "".join(parts[last + 1::2])
+    body = []
+    for i in range(first, last + 1):
+        if i % 2:
+            body.append(f"{{{len(tags)}}}")
+            tags.append(parts[i])
+        else:
+            body.append(parts[i])
+    return " ".join("".join(body).split()), Markup(prefix, suffix, tags)
+
+def restore(translated, markup):
+    """Put markup from protect() back around / into a translation."""
+    if markup is None:
+        return translated
+    if markup.tags:
+        used = set()
+
+        def put_back(m):
+            n = int(m.group(1))
+            if n >= len(markup.tags) or n in used:
+                return m.group()
+            used.add(n)
+            return markup.tags[n]
+
+        translated = _PLACEHOLDER_RE.sub(put_back, translated)
+        # A dropped closing placeholder must not leave a tag open: append it
+        translated += "".join(t for n, t in enumerate(markup.tags) if n not in used and t.startswith("</"))
+    return markup.prefix + translated + markup.suffix
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+In-process counters, gauges and histograms for the translation pipeline.
+
+    metrics = Metrics()
+    server, url = serve_metrics(metrics, port=9464)     # optional: GET /metrics, /metrics.json
+    engine.translate_files_multi(..., metrics=metrics)
+    metrics.write_json("run-metrics.json")
+
+/metrics is Prometheus text format, /metrics.json the same numbers as
+JSON. Nothing is recorded unless a Metrics instance is passed in.
+"""
+
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+LINES_BUCKETS = (1, 5, 10, 20, 35, 50, 100)
+CHARS_BUCKETS = (250, 500, 1000, 2000, 3000, 4000, 5000)
+RATE_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class _Metric:
+    def __init__(self, registry, name, kind, help, buckets=None):
+        self.registry = registry
+        self.name = name
+        self.kind = kind
+        self.help = help
+        self.buckets = tuple(buckets) if buckets else None
+        self.values = {}        # sorted label items -> number, or [bucket counts, sum, count]
+
+    def inc(self, n=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.registry._lock:
+            self.values[key] = self.values.get(key, 0) + n
+
+    def set(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.registry._lock:
+            self.values[key] = value
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.registry._lock:
+            h = self.values.get(key)
+            if h is None:
+                h = self.values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    h[0][i] += 1
+            h[1] += value
+            h[2] += 1
+
+class Metrics:
+    """Thread-safe registry; asking for an existing name returns the same metric."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self.started = time.time()
+
+    def _get(self, name, kind, help, buckets=None):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = _Metric(self, name, kind, help, buckets)
+            return metric
+
+    def counter(self, name, help=""):
+        return self._get(name, "counter", help)
+
+    def gauge(self, name, help=""):
+        return self._get(name, "gauge", help)
+
+    def histogram(self, name, help="", buckets=LATENCY_BUCKETS):
+        return self._get(name, "histogram", help, buckets)
+
+    def snapshot(self):
+        with self._lock:
+            out = {"time": time.time(), "started": self.started, "metrics": {}}
+            for name, m in self._metrics.items():
+                series = []
+                for key, value in m.values.items():
+                    entry = {"labels": dict(key)}
+                    if m.kind == "histogram":
+                        entry.update(buckets=dict(zip(map(str, m.buckets), value[0])), sum=value[1], count=value[2])
+                    else:
+                        entry["value"] = value
+                    series.append(entry)
+                out["metrics"][name] = {"type": m.kind, "help": m.help, "series": series}
+            return out
+
+    def prometheus(self):
+        lines = []
+        with self._lock:
+            for name, m in self._metrics.items():
+                lines.append(f"# HELP {name} {m.help}")
+                lines.append(f"# TYPE {name} {m.kind}")
+                for key, value in m.values.items():
+                    if m.kind != "histogram":
+                        lines.append(f"{name}{_labels(key)} {_number(value)}")
+                        continue
+                    counts, total, n = value
+                    for bound, c in zip(m.buckets, counts):
+                        lines.append(f"{name}_bucket{_labels(key, le=_number(bound))} {c}")
+                    lines.append(f"{name}_bucket{_labels(key, le='+Inf')} {n}")
+                    lines.append(f"{name}_sum{_labels(key)} {_number(total)}")
+                    lines.append(f"{name}_count{_labels(key)} {n}")
+        return "\n".join(lines) + "\n"
+
+    def write_json(self, path):
+        """Atomic, so a watcher never reads half a snapshot."""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+class _NullMetric:
+    def inc(self, n=1, **labels): pass
+    def set(self, value, **labels): pass
+    def observe(self, value, **labels): pass
+
+class NullMetrics:
+    """Stand-in when metrics are off, so call sites don't need to check."""
+    _metric = _NullMetric()
+
+    def counter(self, name, help=""): return self._metric
+    def gauge(self, name, help=""): return self._metric
+    def histogram(self, name, help="", buckets=None): return self._metric
+
+NULL_METRICS = NullMetrics()
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _labels(key, **extra):
+    items = list(key) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in items) + "}"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def serve_metrics(metrics, host="127.0.0.1", port=0):
+    """Serve /metrics and /metrics.json from a background thread; returns (server, url)."""
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                body, ctype = metrics.prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/metrics.json":
+                body, ctype = json.dumps(metrics.snapshot()), "application/json"
+            else:
+                self.send_error(404)
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/metrics"
@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+Cues that don't need a translator.
+
+CueClassifier looks at a cue's normalized text and names the rule that
+lets it skip the network, or None:
+
+    symbols    nothing but symbols and punctuation (♪, - -, ..., *)
+    numbers    digits with no letters (1984, 12:30, 3.5, #2)
+    sound_tag  only SDH sound tags ([DOOR SLAMS], (sighs)) plus punctuation;
+               off unless asked for, since some viewers want them translated
+
+symbols and numbers are copied unchanged. Sound tags are copied too, or
+mapped through a lookup table (JSON, per target language, keys matched
+case-insensitively):
+
+    {"fr": {"[door slams]": "[PORTE QUI CLAQUE]", "(sighs)": "(soupire)"}}
+"""
+
+import re
+import json
+
+DEFAULT_SOUND_TAG_PATTERNS = (r"\[[^\[\]]*\]", r"\([^()]*\)")
+
+RULES = ("symbols", "numbers", "sound_tag")
+
+def load_table(path):
+    """{target code: {lowercased tag: replacement}} from a JSON file."""
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return {code: {tag.strip().lower(): text for tag, text in tags.items()} for code, tags in data.items()}
+
+class CueClassifier:
+    def __init__(self, sound_tags=False, patterns=None, table=None):
+        """patterns: regexes for one sound tag (default: [...] and (...)); table: see load_table."""
+        self.table = table or {}
+        self.sound_tags = sound_tags or bool(self.table)
+        self._tag_re = re.compile("|".join(f"(?:{p})" for p in (patterns or DEFAULT_SOUND_TAG_PATTERNS)))
+
+    def classify(self, text):
+        """Rule name if text can be kept (or mapped) without a request, else None."""
+        if not any(ch.isalpha() for ch in text):
+            return "numbers" if any(ch.isdigit() for ch in text) else "symbols"
+        if self.sound_tags and self._tag_re.search(text) and not any(
+                ch.isalnum() for ch in self._tag_re.sub("", text)):
+            return "sound_tag"
+        return None
+
+    def output(self, text, rule, target):
+        """Replacement text for a classified cue, or None to keep the original."""
+        tags = self.table.get(target) if rule == "sound_tag" else None
+        if not tags:
+            return None
+        mapped = self._tag_re.sub(lambda m: tags.get(m.group(0).strip().lower(), m.group(0)), text)
+        # Nothing in the table: the original keeps its line breaks
+        return mapped if mapped != text else None
+
+DEFAULT_CLASSIFIER = CueClassifier()
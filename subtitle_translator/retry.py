@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+"""
+Retry with jittered exponential backoff for transient translator errors.
+"""
+
+import time
+import random
+
+DEFAULT_RETRIES = 4
+DEFAULT_BASE_DELAY = 0.5
+DEFAULT_MAX_DELAY = 20.0
+
+def backoff_delay(attempt, base_delay=DEFAULT_BASE_DELAY, max_delay=DEFAULT_MAX_DELAY):
+    """Full jitter: uniform in [0, min(max_delay, base * 2**attempt)]."""
+    return random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+
+def retry_call(fn, is_transient, retries=DEFAULT_RETRIES, base_delay=DEFAULT_BASE_DELAY,
+               max_delay=DEFAULT_MAX_DELAY, on_retry=None, sleep=time.sleep):
+    """
+    Call fn() until it succeeds, a non-transient error is raised, or
+    retries are used up (the last error is re-raised).
+    on_retry(attempt, error) is called before each backoff sleep.
+    """
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= retries or not is_transient(e):
+                raise
+            if on_retry:
+                on_retry(attempt, e)
+            sleep(backoff_delay(attempt, base_delay, max_delay))
+            attempt += 1
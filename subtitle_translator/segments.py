@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Wire protocols for sending several segments in one translator request.
+
+"markers" (default): segments are separated by numbered markers
+
+    first segment\n[[1]]\nsecond segment\n[[2]]\nthird segment
+
+Eight or nine characters per boundary instead of ~50, deterministic, and
+made of brackets and digits, which translators pass through unchanged.
+Decoding looks for markers 1..n-1 in order: first in their exact form,
+then leniently (inner spaces, one bracket lost, full-width brackets,
+newlines dropped), so a slightly mangled marker still splits cleanly.
+If a segment already contains a bracketed number, numbering starts
+past it.
+
+"legacy": the original \n\n||---UNIQUE_SUB_SPLIT_<id>---||\n\n delimiter,
+kept for comparison (python -m subtitle_translator.bench --protocols).
+"""
+
+import re
+import zlib
+
+_STRICT_RE = re.compile(r"\[\[\s*(\d+)\s*\]\]")
+_LENIENT_RE = re.compile(r"[\[［【]\s*[\[［【]?\s*(\d+)\s*[\]］】]?\s*[\]］】]")
+
+class MarkerProtocol:
+    name = "markers"
+    # Worst case per boundary, up to marker 9999
+    overhead = len("\n[[9999]]\n")
+
+    def encode(self, texts):
+        """(payload, first marker number)."""
+        base = 1
+        for t in texts:
+            if "[" in t or "［" in t or "【" in t:
+                for m in _LENIENT_RE.finditer(t):
+                    base = max(base, int(m.group(1)) + 1)
+        parts = [texts[0]] if texts else []
+        for n, t in enumerate(texts[1:]):
+            parts.append(f"\n[[{base + n}]]\n")
+            parts.append(t)
+        return "".join(parts), base
+
+    def decode(self, translated, count, base):
+        """count stripped parts, or None if the markers can't be found in order."""
+        if count == 1:
+            return [translated.strip()]
+        for pattern in (_STRICT_RE, _LENIENT_RE):
+            cuts = []
+            expected = base
+            for m in pattern.finditer(translated):
+                if int(m.group(1)) == expected:
+                    cuts.append(m.span())
+                    expected += 1
+                    if len(cuts) == count - 1:
+                        break
+            if len(cuts) == count - 1:
+                parts = []
+                start = 0
+                for a, b in cuts:
+                    parts.append(translated[start:a].strip())
+                    start = b
+                parts.append(translated[start:].strip())
+                return parts
+        return None
+
+class LegacyDelimiter:
+    name = "legacy"
+    overhead = len(f"\n\n||---UNIQUE_SUB_SPLIT_{0xFFFFFFFF}---||\n\n")
+
+    def encode(self, texts):
+        # crc32 rather than hash(): the same batch gets the same delimiter in every process
+        delimiter = f"\n\n||---UNIQUE_SUB_SPLIT_{zlib.crc32(chr(0).join(texts).encode('utf-8'))}---||\n\n"
+        return delimiter.join(texts), delimiter
+
+    def decode(self, translated, count, delimiter):
+        parts = translated.split(delimiter)
+        if len(parts) != count:
+            return None
+        return [p.strip() for p in parts]
+
+PROTOCOLS = {p.name: p for p in (MarkerProtocol(), LegacyDelimiter())}
+DEFAULT_PROTOCOL = "markers"
+
+def get_protocol(name=None):
+    try:
+        return PROTOCOLS[name or DEFAULT_PROTOCOL]
+    except KeyError:
+        raise ValueError(f"Unknown segment protocol: {name}") from None
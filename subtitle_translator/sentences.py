@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Optional cross-cue sentence merging.
+
+A sentence split over consecutive cues ("I told you we should" / "never
+have come here.") is sent as one segment, so the translator sees the
+whole sentence and the request carries one delimiter instead of two.
+The translation is then cut back into as many parts as there were cues,
+in proportion to the source lengths, at the nearest word boundary.
+"""
+
+import unicodedata
+
+from .langid import script
+
+# Default largest gap between two cues of one sentence
+DEFAULT_MERGE_GAP_MS = 1000
+MAX_MERGED_CUES = 3
+MAX_MERGED_CHARS = 300
+
+# Written without spaces between words: cut anywhere between characters
+_UNSPACED_SCRIPTS = {"han", "kana", "thai"}
+
+_SENTENCE_END = (".", "!", "?", "…", "♪", '"', "”", "»", ")", "]", ":", ";")
+
+def _continues(text, next_text):
+    """text doesn't end its sentence and next_text isn't a new speaker."""
+    if text.endswith("...") or text.endswith("…"):
+        # Trailing ellipsis only joins when the next cue picks it up ("...never")
+        return next_text.startswith(("...", "…")) or next_text[:1].islower()
+    if text.endswith(_SENTENCE_END):
+        return False
+    return not next_text.startswith(("-", "–", "—"))
+
+def find_runs(subs, texts, markup, max_gap_ms=DEFAULT_MERGE_GAP_MS, max_cues=MAX_MERGED_CUES,
+              max_chars=MAX_MERGED_CHARS, kept=()):
+    """
+    [(i, i+1, ...)] runs of two or more consecutive cues that form one sentence.
+    texts/markup are the per-cue normalized text and markup.Markup from protect();
+    cues with inner tags (numbered placeholders) or several speakers are left alone,
+    and so are the indices in kept (cues copied without a request).
+    """
+    def mergeable(i):
+        m = markup[i]
+        return texts[i] and i not in kept and (m is None or not m.tags) and "\n-" not in subs[i].text
+
+    runs = []
+    run = []
+    size = 0
+    for i in range(len(subs)):
+        if run and mergeable(i) and len(run) < max_cues and size + len(texts[i]) <= max_chars \
+                and _gap(subs[run[-1]], subs[i]) <= max_gap_ms and _continues(texts[run[-1]], texts[i]):
+            run.append(i)
+            size += len(texts[i]) + 1
+            continue
+        if len(run) > 1:
+            runs.append(tuple(run))
+        run, size = ([i], len(texts[i])) if mergeable(i) else ([], 0)
+    if len(run) > 1:
+        runs.append(tuple(run))
+    return runs
+
+def _gap(a, b):
+    try:
+        return b.start - a.end
+    except TypeError:
+        # pysrt times
+        return b.start.ordinal - a.end.ordinal
+
+def split_translation(text, weights):
+    """
+    Cut text into len(weights) parts sized like weights, at spaces. Only
+    scripts written without spaces (Chinese, Japanese, Thai) are cut between
+    characters; other text never has a word split, and when it runs out of
+    words the remaining cues repeat the last part, keeping it on screen.
+    """
+    if len(weights) == 1:
+        return [text]
+    total = sum(weights) or len(weights)
+    spaces = [i for i, c in enumerate(text) if c == " "]
+    unspaced = script(text) in _UNSPACED_SCRIPTS
+    parts = []
+    start = 0
+    acc = 0
+    for w in weights[:-1]:
+        acc += w
+        target = round(len(text) * acc / total)
+        # Nearest space after the previous cut
+        candidates = [i for i in spaces if i > start]
+        if candidates:
+            cut = min(candidates, key=lambda i: abs(i - target))
+        elif unspaced:
+            cut = max(target, start)
+            # Not between a letter and its marks (Thai vowels and tones)
+            while cut < len(text) and unicodedata.category(text[cut]) == "Mn":
+                cut += 1
+        else:
+            break
+        parts.append(text[start:cut].strip())
+        start = cut
+    parts.append(text[start:].strip())
+    return parts + parts[-1:] * (len(weights) - len(parts))
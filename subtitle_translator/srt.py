@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Small, fast SRT reader/writer.
+
+Cues are __slots__ objects with integer millisecond times, about a tenth
+of the memory of pysrt's SubRipItem/SubRipTime objects. Parsing is a single
+pass over the lines that keys on the "-->" timing line rather than on the
+index, so these all still parse:
+
+  - a BOM
+  - CRLF line endings
+  - missing, duplicated or non-numeric indices
+  - "." instead of "," in times
+  - short millisecond fields
+  - blank lines inside a cue's text
+  - no blank line before the next cue
+
+A SubRipItem-like interface (index/start/end/text) is kept, so code written
+against pysrt items works on Cue lists too.
+"""
+
+import os
+import re
+
+_TIME = r"(\d+):(\d{1,2}):(\d{1,2})(?:[,.:](\d{1,3}))?"
+_TIMING_RE = re.compile(rf"^[ \t]*{_TIME}[ \t]*-->[ \t]*{_TIME}(.*)$")
+# Same, for finditer over a whole document
+_TIMING_LINE_RE = re.compile(rf"^[ \t]*{_TIME}[ \t]*-->[ \t]*{_TIME}([^\n]*)$", re.M)
+
+class Cue:
+    __slots__ = ("index", "start", "end", "text", "position")
+
+    def __init__(self, index, start, end, text, position=""):
+        self.index = index
+        self.start = start      # milliseconds
+        self.end = end
+        self.text = text
+        self.position = position  # anything after the end time (X1:… Y2:…)
+
+    def __repr__(self):
+        return f"Cue({self.index}, {format_time(self.start)} --> {format_time(self.end)}, {self.text!r})"
+
+# int() on short digit strings is the hot spot of parse(); look them up instead
+_NUM = {str(i).zfill(w): i for w in (1, 2) for i in range(100)}
+_FRAC = {str(i).zfill(w): int(str(i).zfill(w).ljust(3, "0")) for w in (1, 2, 3) for i in range(10 ** w)}
+_FRAC[None] = 0
+
+def _ms(h, m, s, frac):
+    # "5" means 500 ms, as in "00:00:01,5"
+    return ((int(h) * 60 + int(m)) * 60 + int(s)) * 1000 + (int(frac.ljust(3, "0")) if frac else 0)
+
+def format_time(ms):
+    if not isinstance(ms, int):
+        return str(ms)      # pysrt SubRipTime and friends
+    ms = max(ms, 0)
+    s, ms = divmod(ms, 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
+
+def iter_cues(lines):
+    """Yield a Cue per timing line from any iterable of lines (a file object streams)."""
+    cue = None
+    text = []
+    count = 0
+    first = True
+    for line in lines:
+        line = line.rstrip("\r\n")
+        if first:
+            line = line.lstrip("\ufeff")
+            first = False
+        m = _TIMING_RE.match(line) if "-->" in line else None
+        if m is None:
+            text.append(line)
+            continue
+        index = _pop_index(text)
+        if cue is not None:
+            cue.text = _join(text)
+            yield cue
+        count += 1
+        g = m.groups()
+        cue = Cue(count if index is None else index, _ms(*g[0:4]), _ms(*g[4:8]), "", g[8].strip())
+        text = []
+    if cue is not None:
+        cue.text = _join(text)
+        yield cue
+
+def _pop_index(text):
+    """
+    Take the index line off the end of the previous cue's text. A bare number
+    always counts; a single garbled token ("1a", a mis-decoded BOM) counts
+    after a blank line. Returns the number, or None to use the running count.
+    """
+    if not text:
+        return None
+    last = text[-1].strip()
+    if last.isdecimal():
+        text.pop()
+        return int(last)
+    if (len(text) == 1 or not text[-2].strip()) and last and " " not in last and any(c.isdigit() for c in last):
+        text.pop()
+    return None
+
+def _join(text):
+    while text and not text[-1].strip():
+        text.pop()
+    start = 0
+    while start < len(text) and not text[start].strip():
+        start += 1
+    return "\n".join(text[start:])
+
+def parse(text):
+    """
+    All cues of an SRT document given as a string. Same rules as iter_cues,
+    but the regex engine finds the timing lines and a well-formed block
+    ("text\n\nINDEX") is split without looking at its lines one by one.
+    """
+    text = text.lstrip("\ufeff")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    cues = []
+    matches = list(_TIMING_LINE_RE.finditer(text))
+    if not matches:
+        return cues
+    index = _pop_index(text[:matches[0].start()].split("\n"))
+    last = len(matches) - 1
+    for n, m in enumerate(matches):
+        if n < last:
+            # The tail of this cue's block holds the next cue's index line
+            block = text[m.end() + 1:matches[n + 1].start() - 1]
+            body, sep, tail = block.rpartition("\n\n")
+            if sep and tail.isdecimal() and body and not body[0].isspace() and not body[-1].isspace():
+                cue_text, next_index = body, int(tail)
+            else:
+                lines = block.split("\n")
+                next_index = _pop_index(lines)
+                cue_text = _join(lines)
+        else:
+            cue_text, next_index = _join(text[m.end() + 1:].split("\n")), None
+        h1, m1, s1, f1, h2, m2, s2, f2, position = m.groups()
+        try:
+            start = _NUM[h1] * 3600000 + _NUM[m1] * 60000 + _NUM[s1] * 1000 + _FRAC[f1]
+            end = _NUM[h2] * 3600000 + _NUM[m2] * 60000 + _NUM[s2] * 1000 + _FRAC[f2]
+        except KeyError:    # 100+ hours
+            start, end = _ms(h1, m1, s1, f1), _ms(h2, m2, s2, f2)
+        cues.append(Cue(n + 1 if index is None else index, start, end, cue_text, position.strip()))
+        index = next_index
+    return cues
+
+def read(path, encoding="utf-8-sig"):
+    """Stream cues from a file without loading it whole."""
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as f:
+        yield from iter_cues(f)
+
+def compose(cue):
+    position = f" {cue.position}" if getattr(cue, "position", "") else ""
+    return f"{cue.index}\n{format_time(cue.start)} --> {format_time(cue.end)}{position}\n{cue.text}\n"
+
+def write(cues, f, eol=None):
+    """Write cues to an open text file, one at a time (same layout as pysrt)."""
+    eol = eol or os.linesep
+    for cue in cues:
+        block = compose(cue)
+        if eol != "\n":
+            block = block.replace("\n", eol)
+        f.write(block)
+        if not block.endswith(eol * 2):
+            f.write(eol)
+
+def save(cues, path, encoding="utf-8", eol=None):
+    with open(path, "w", encoding=encoding, newline="") as f:
+        write(cues, f, eol)
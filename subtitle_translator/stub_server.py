@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the Google web translation endpoint, for offline load
+tests of batching, retries and concurrency.
+
+    python -m subtitle_translator.stub_server --port 8765 --latency 0.2 --rate-429 0.05 --mangle 0.02
+    python -m subtitle_translator translate -t si "*.srt" --backend-url http://127.0.0.1:8765/m
+
+Answers GET /m?sl=..&tl=..&q=.. with the same <div class="t0"> markup the
+real endpoint uses. The "translation" is a deterministic transform of q.
+"""
+
+import re
+import sys
+import html
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+# Segment boundaries of both protocols in segments.py: legacy delimiters and [[n]] markers
+_DELIMITER_RE = re.compile(r"\|\|---UNIQUE_SUB_SPLIT_\d+---\|\||\[\[\d+\]\]")
+
+TRANSFORMS = {
+    "echo": lambda text, tl: text,
+    "upper": lambda text, tl: text.upper(),
+    "prefix": lambda text, tl: f"[{tl}] {text}",
+    "reverse": lambda text, tl: " ".join(reversed(text.split(" "))),
+}
+
+class StubOptions:
+    def __init__(self, latency=0.0, jitter=0.0, rate_429=0.0, rate_500=0.0, truncate=0.0, mangle=0.0,
+                 transform="prefix", seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.truncate = truncate
+        self.mangle = mangle
+        self.transform = transform
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {"requests": 0, "429": 0, "500": 0, "truncated": 0, "mangled": 0}
+
+    def roll(self, rate):
+        with self.lock:
+            return self.random.random() < rate
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+def _transform(text, tl, opts):
+    # Translate each segment, leave the delimiters and the whitespace around them intact
+    fn = TRANSFORMS[opts.transform]
+    out = []
+    for piece in _DELIMITER_RE.split(text):
+        body = piece.strip()
+        if body:
+            lead = piece[:len(piece) - len(piece.lstrip())]
+            trail = piece[len(piece.rstrip()):]
+            piece = lead + fn(body, tl) + trail
+        out.append(piece)
+    return "".join(d for pair in zip(out, _DELIMITER_RE.findall(text) + [""]) for d in pair)
+
+_MANGLES = {
+    # What real MT engines do to markers: drop a pipe, space it out, lowercase it, lose it
+    "legacy": [
+        lambda d: d[1:],
+        lambda d: d.replace("---", "- --", 1),
+        lambda d: d.lower(),
+        lambda d: "",
+    ],
+    # ...or, for [[n]]: drop a bracket, pad the number, switch to full-width brackets, lose it
+    "markers": [
+        lambda d: d[1:],
+        lambda d: d.replace("[[", "[[ ").replace("]]", " ]]"),
+        lambda d: d.replace("[", "［").replace("]", "］"),
+        lambda d: "",
+    ],
+}
+
+def _mangle(text, opts):
+    delims = list(_DELIMITER_RE.finditer(text))
+    if not delims:
+        return text
+    m = delims[opts.random.randrange(len(delims))]
+    kind = "markers" if m.group(0).startswith("[[") else "legacy"
+    broken = opts.random.choice(_MANGLES[kind])(m.group(0))
+    return text[:m.start()] + broken + text[m.end():]
+
+def make_handler(opts):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status, body):
+            data = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/stats":
+                with opts.lock:
+                    self._send(200, repr(opts.counts))
+                return
+            qs = parse_qs(url.query)
+            text = qs.get("q", [""])[0]
+            tl = qs.get("tl", ["en"])[0]
+            opts.count("requests")
+            delay = opts.latency + (opts.random.uniform(0, opts.jitter) if opts.jitter else 0)
+            if delay:
+                time.sleep(delay)
+            if opts.roll(opts.rate_429):
+                opts.count("429")
+                return self._send(429, "Too Many Requests")
+            if opts.roll(opts.rate_500):
+                opts.count("500")
+                return self._send(500, "Internal Server Error")
+            result = _transform(text, tl, opts)
+            if opts.roll(opts.mangle):
+                opts.count("mangled")
+                result = _mangle(result, opts)
+            if opts.roll(opts.truncate):
+                opts.count("truncated")
+                result = result[:max(1, int(len(result) * opts.random.uniform(0.3, 0.9)))]
+            self._send(200, f'<html><body><div class="t0">{html.escape(result)}</div></body></html>')
+
+    return Handler
+
+def start_stub_server(host="127.0.0.1", port=0, **options):
+    """Start in a background thread; returns (server, url). server.shutdown() stops it."""
+    opts = StubOptions(**options)
+    server = ThreadingHTTPServer((host, port), make_handler(opts))
+    server.daemon_threads = True
+    server.options = opts
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}/m"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m subtitle_translator.stub_server",
+                                     description="Local stand-in translation server for offline load tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, 0..JITTER seconds")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of requests answered 429")
+    parser.add_argument("--rate-500", type=float, default=0.0, help="fraction of requests answered 500")
+    parser.add_argument("--truncate", type=float, default=0.0, help="fraction of responses cut short")
+    parser.add_argument("--mangle", type=float, default=0.0, help="fraction of responses with a damaged delimiter")
+    parser.add_argument("--transform", choices=sorted(TRANSFORMS), default="prefix")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    opts = StubOptions(args.latency, args.jitter, args.rate_429, args.rate_500, args.truncate,
+                       args.mangle, args.transform, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(opts))
+    server.daemon_threads = True
+    sys.stderr.write(f"Stub translator on http://{args.host}:{args.port}/m\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        sys.stderr.write(f"{opts.counts}\n")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in span tracing in Chrome trace-event format.
+
+    tracer = Tracer()
+    engine.stream_translate(..., tracer=tracer)
+    tracer.write("run.trace.json")
+
+Open the file in chrome://tracing or https://ui.perfetto.dev: one row per
+thread, with parse, batch, request, save spans and retry markers, so idle
+gaps and head-of-line blocking are visible.
+"""
+
+import os
+import json
+import time
+import threading
+
+class _Span:
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.complete(self.name, self.start, time.perf_counter(), self.cat, **self.args)
+        return False
+
+class Tracer:
+    """Buffers events in memory (thread-safe); write() dumps them once the run is over."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._events = []
+        self._threads = {}      # thread ident -> small tid
+
+    def _tid(self):
+        ident = threading.get_ident()
+        tid = self._threads.get(ident)
+        if tid is None:
+            tid = self._threads[ident] = len(self._threads) + 1
+            self._events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid,
+                                 "args": {"name": threading.current_thread().name}})
+        return tid
+
+    def _us(self, t):
+        return round((t - self._origin) * 1e6, 1)
+
+    def span(self, name, cat="pipeline", **args):
+        """Context manager timing the block on the calling thread."""
+        return _Span(self, name, cat, args)
+
+    def complete(self, name, start, end, cat="pipeline", **args):
+        """A span from perf_counter() start to end that was measured elsewhere."""
+        with self._lock:
+            self._events.append({"name": name, "cat": cat, "ph": "X", "ts": self._us(start),
+                                 "dur": round((end - start) * 1e6, 1), "pid": os.getpid(),
+                                 "tid": self._tid(), "args": args})
+
+    def instant(self, name, cat="pipeline", **args):
+        with self._lock:
+            self._events.append({"name": name, "cat": cat, "ph": "i", "s": "t",
+                                 "ts": self._us(time.perf_counter()), "pid": os.getpid(),
+                                 "tid": self._tid(), "args": args})
+
+    def write(self, path):
+        with self._lock:
+            events = list(self._events)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+class NullTracer:
+    """Stand-in when tracing is off, so call sites don't need to check."""
+    _span = _NullSpan()
+
+    def span(self, name, cat="pipeline", **args): return self._span
+    def complete(self, name, start, end, cat="pipeline", **args): pass
+    def instant(self, name, cat="pipeline", **args): pass
+
+NULL_TRACER = NullTracer()